@@ -1,8 +1,49 @@
 # api/admin.py
 
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+from . import eligibility, points, ratings
 from .models import ScientificDomain, UserProfile, UserFieldProgress, Article, UserArticle, Review
 
+# Below this many rows an exact COUNT(*) is cheap enough
+ESTIMATE_THRESHOLD = 100000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Takes the row count of an unfiltered changelist from the PostgreSQL planner statistics
+    (pg_class.reltuples, kept current by autovacuum) instead of a COUNT(*) over the whole
+    table. Filtered and searched changelists, small tables and other databases are
+    counted exactly.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor == 'postgresql' and not queryset.query.where:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                    [connection.ops.quote_name(queryset.model._meta.db_table)],
+                )
+                row = cursor.fetchone()
+            # -1 until the table is first analyzed
+            if row and row[0] >= ESTIMATE_THRESHOLD:
+                return row[0]
+        return super().count
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelists of tables that grow with the users: estimated totals, no second full count."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Also orders autocomplete results, which are paginated too
+    ordering = ('-pk',)
+
 
 @admin.register(ScientificDomain)
 class ScientificDomainAdmin(admin.ModelAdmin):
@@ -10,29 +51,68 @@ class ScientificDomainAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 @admin.register(UserProfile)
-class UserProfileAdmin(admin.ModelAdmin):
+class UserProfileAdmin(LargeTableAdmin):
     list_display = ('id', 'user')
+    list_select_related = ('user',)
     search_fields = ('user__username',)
+    autocomplete_fields = ('user',)
 
 @admin.register(UserFieldProgress)
-class UserFieldProgressAdmin(admin.ModelAdmin):
-    list_display = ('id', 'user_profile', 'scientific_domain', 'current_points')
-    list_filter = ('scientific_domain',)
+class UserFieldProgressAdmin(LargeTableAdmin):
+    # current_points is the stored ledger column, not a per-row aggregate
+    list_display = ('id', 'user_profile', 'scientific_domain', 'current_points', 'active')
+    list_select_related = ('user_profile__user', 'scientific_domain')
+    list_filter = ('scientific_domain', 'active')
     search_fields = ('user_profile__user__username', 'scientific_domain__name')
+    autocomplete_fields = ('user_profile', 'scientific_domain')
+    actions = ('recalculate_points', 'deactivate', 'reactivate')
+
+    @admin.action(description="Recalculate points from the reading history")
+    def recalculate_points(self, request, queryset):
+        updated = points.recalculate(queryset)
+        self.message_user(request, f"Recalculated the points of {updated} progress rows.", messages.SUCCESS)
+
+    @admin.action(description="Deactivate (soft-delete) the selected progress")
+    def deactivate(self, request, queryset):
+        self.set_active(request, queryset, False)
+
+    @admin.action(description="Reactivate the selected progress")
+    def reactivate(self, request, queryset):
+        self.set_active(request, queryset, True)
+
+    def set_active(self, request, queryset, active):
+        changed = queryset.exclude(active=active)
+        # A queryset update sends no post_save, so expire the users' eligibility here
+        eligibility.invalidate(*changed.values_list('user_profile__user_id', flat=True).distinct())
+        updated = changed.update(active=active)
+        verb = "Reactivated" if active else "Deactivated"
+        self.message_user(request, f"{verb} {updated} progress rows.", messages.SUCCESS)
 
 @admin.register(Article)
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(LargeTableAdmin):
     list_display = ('id', 'title', 'scientific_domain', 'points', 'minimum_points')
+    list_select_related = ('scientific_domain',)
     list_filter = ('scientific_domain',)
     search_fields = ('title',)
+    autocomplete_fields = ('scientific_domain',)
+    actions = ('recalculate_ratings',)
+
+    @admin.action(description="Recalculate review statistics")
+    def recalculate_ratings(self, request, queryset):
+        updated = ratings.recalculate(queryset)
+        self.message_user(request, f"Recalculated the ratings of {updated} articles.", messages.SUCCESS)
 
 @admin.register(UserArticle)
-class UserArticleAdmin(admin.ModelAdmin):
+class UserArticleAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'article', 'status', 'page_left_off')
+    list_select_related = ('user', 'article')
     list_filter = ('status', 'article__scientific_domain')
     search_fields = ('user__username', 'article__title')
+    autocomplete_fields = ('user', 'article')
 
 @admin.register(Review)
-class ReviewAdmin(admin.ModelAdmin):
+class ReviewAdmin(LargeTableAdmin):
     list_display = ('id', 'user', 'article', 'score', 'created_at')
+    list_select_related = ('user', 'article')
     search_fields = ('user__username', 'article__title')
+    autocomplete_fields = ('user', 'article')
@@ -1,6 +1,7 @@
 # api/apps.py
 
 from django.apps import AppConfig
+from django.conf import settings
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
@@ -8,3 +9,6 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         import api.signals  # noqa
+        if 'api.instrumentation.InstrumentationMiddleware' in settings.MIDDLEWARE:
+            from api.instrumentation import install
+            install()
@@ -0,0 +1,254 @@
+# api/async_views.py
+"""
+Native async versions of the hottest endpoints, served instead of the viewsets when the
+project runs under ASGI (okok/asgi.py turns on API_ASYNC_VIEWS):
+
+    GET   articles/               ArticleListView
+    GET   articles/<pk>/          ArticleDetailView
+    GET   profile/, PATCH         AsyncProfileView
+    PATCH user-articles/<pk>/     UserArticleProgressView (page_left_off only)
+
+They return the same representations, validators and status codes as the synchronous
+views and reuse their serializers and paginators, so an ASGI worker never parks a thread
+on a waiting client. Reads go through the async ORM and cache APIs. Independent lookups,
+such as the table versions and the eligibility snapshot, are awaited together with
+asyncio.gather.
+
+Everything else on these routes is handed to the viewsets through sync_to_async. That
+covers the other methods, writes that need a transaction or the points ledger signals,
+and anything asking for the browsable API. Like the viewsets, they read from a replica
+when api.routing allows it.
+"""
+
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser, User
+from django.http import HttpResponse
+from django.utils.cache import patch_vary_headers
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import eligibility, routing
+from .authentication import CachedJWTAuthentication
+from .conditional import atable_versions, make_validators, not_modified, set_validators
+from .instrumentation import TimedJSONRenderer
+from .models import Article, UserArticle, UserProfile
+from .pagination import KeysetPagination
+from .serializers import ArticleListSerializer, ArticleSerializer, UserArticleSerializer, UserSerializer
+from .views import ArticleViewSet, ProfileView, UserArticleViewSet
+
+
+class AsyncAPIView(View):
+    """
+    The small part of APIView the async endpoints need: JWT authentication, a DRF Request
+    for query_params, data and serializer context, JSON rendering and APIException
+    handling. Methods without an async handler go to ``fallback``.
+    """
+    fallback = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Authentication is by bearer token only, like the DRF views
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None) if method in self.http_method_names else None
+        if handler is None or method == 'options' or 'text/html' in request.headers.get('Accept', ''):
+            return await self.fall_back(request, *args, **kwargs)
+
+        # Buffer the body so a fallback can still parse it after we did
+        request.body
+        self.authenticator = CachedJWTAuthentication()
+        self.request = Request(
+            request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES], authenticators=()
+        )
+        try:
+            auth = await self.authenticator.aauthenticate(request)
+            self.request.user = auth[0] if auth else AnonymousUser()
+            token = await routing.astart(request, self.request.user)
+            try:
+                response = await handler(request, *args, **kwargs)
+            finally:
+                await routing.afinish(token, self.request.user)
+        except exceptions.APIException as exc:
+            response = self.handle_exception(exc)
+        patch_vary_headers(response, ['Accept'])
+        return response
+
+    async def fall_back(self, request, *args, **kwargs):
+        # The handler renders the DRF Response
+        return await sync_to_async(self.fallback)(request, *args, **kwargs)
+
+    def require_user(self):
+        if not self.request.user.is_authenticated:
+            raise exceptions.NotAuthenticated()
+        return self.request.user
+
+    def respond(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(TimedJSONRenderer().render(data), status=status_code, content_type='application/json')
+
+    def handle_exception(self, exc):
+        data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+        response = self.respond(data, exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response['WWW-Authenticate'] = self.authenticator.authenticate_header(self.request)
+        return response
+
+
+class ConditionalArticleView(AsyncAPIView):
+    """ArticleViewSet's validators: the article and domain tables plus the user's eligibility."""
+    version_tables = ArticleViewSet.version_tables
+
+    async def validators(self, user):
+        if not user.is_authenticated:
+            versions, changed = await atable_versions(self.version_tables)
+            return make_validators(self.request, self.version_tables, versions, changed), None
+        (versions, changed), snapshot = await asyncio.gather(
+            atable_versions(self.version_tables), eligibility.adomain_points(user)
+        )
+        return make_validators(self.request, self.version_tables, versions, changed, user, snapshot), snapshot
+
+    def not_modified_response(self, etag, last_modified):
+        if not_modified(self.request, etag, last_modified):
+            return set_validators(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified, True)
+        return None
+
+    def queryset(self, compact):
+        return ArticleViewSet.select_columns(
+            Article.objects.select_related('scientific_domain'), self.request, compact=compact
+        )
+
+
+class ArticleListView(ConditionalArticleView):
+    fallback = staticmethod(ArticleViewSet.as_view({'get': 'list', 'post': 'create'}))
+
+    async def get(self, request):
+        user = self.request.user
+        (etag, last_modified), snapshot = await self.validators(user)
+        response = self.not_modified_response(etag, last_modified)
+        if response is not None:
+            return response
+
+        queryset = self.queryset(compact=True)
+        if user.is_authenticated:
+            queryset = queryset.eligible_for(user)
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(queryset, self.request)
+
+        serializer_class = ArticleSerializer if ArticleSerializer.requested_fields(self.request) else ArticleListSerializer
+        data = serializer_class(page, many=True, context={'request': self.request}).data
+        response = self.respond(paginator.get_paginated_response(data).data)
+        return set_validators(response, etag, last_modified, True)
+
+
+class ArticleDetailView(ConditionalArticleView):
+    fallback = staticmethod(ArticleViewSet.as_view({
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+    }))
+
+    async def get(self, request, pk):
+        user = self.require_user()
+        (etag, last_modified), snapshot = await self.validators(user)
+        response = self.not_modified_response(etag, last_modified)
+        if response is not None:
+            return response
+
+        try:
+            article = await self.queryset(compact=False).aget(pk=pk)
+        except Article.DoesNotExist:
+            raise not_found(Article)
+        if not eligibility.allowed(snapshot, article):
+            raise exceptions.PermissionDenied()
+
+        data = ArticleSerializer(article, context={'request': self.request}).data
+        return set_validators(self.respond(data), etag, last_modified, True)
+
+
+class ProfileRepresentation:
+    """
+    The user as UserSerializer reads it, with the profile's interests and progress
+    already fetched, so serializing it needs no query.
+    """
+
+    def __init__(self, user, interests, progress):
+        self.user = user
+        self.profile = self
+        self.active_interests = interests
+        self.progress_with_domains = progress
+
+    def __getattr__(self, name):
+        return getattr(self.user, name)
+
+
+class AsyncProfileView(AsyncAPIView):
+    fallback = staticmethod(ProfileView.as_view())
+
+    async def get(self, request):
+        return self.respond(await self.representation(self.require_user()))
+
+    async def patch(self, request):
+        user = self.require_user()
+        serializer = UserSerializer(user, data=self.request.data, partial=True, context={'request': self.request})
+        # set_interests runs in a transaction, which the async ORM can't open
+        if not await sync_to_async(self.save)(serializer):
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+        return self.respond(await self.representation(user))
+
+    def save(self, serializer):
+        if not serializer.is_valid():
+            return False
+        serializer.save()
+        return True
+
+    async def representation(self, user):
+        if User.profile.is_cached(user):
+            profile = user.profile
+        else:
+            profile = await UserProfile.objects.aget(user=user)
+        interests, progress = await asyncio.gather(
+            alist(profile.active_interests), alist(profile.progress_with_domains)
+        )
+        return UserSerializer(ProfileRepresentation(user, interests, progress)).data
+
+
+class UserArticleProgressView(AsyncAPIView):
+    """
+    Reading-position updates, sent every few pages by the reader. Only page_left_off
+    changes are handled here; they never touch the points ledger. Status changes go
+    through UserArticleViewSet.
+    """
+    fallback = staticmethod(UserArticleViewSet.as_view({
+        'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'
+    }))
+
+    async def patch(self, request, pk):
+        user = self.require_user()
+        data = self.request.data
+        if not hasattr(data, 'keys') or set(data.keys()) != {'page_left_off'}:
+            return await self.fall_back(request, pk=pk)
+
+        try:
+            user_article = await UserArticle.objects.aget(pk=pk, user=user)
+        except UserArticle.DoesNotExist:
+            raise not_found(UserArticle)
+        serializer = UserArticleSerializer(user_article, data=data, partial=True, context={'request': self.request})
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status.HTTP_400_BAD_REQUEST)
+
+        user_article.page_left_off = serializer.validated_data['page_left_off']
+        await user_article.asave(update_fields=['page_left_off', 'updated_at'])
+        return self.respond(UserArticleSerializer(user_article).data)
+
+
+def not_found(model):
+    # Same message as the viewsets' get_object_or_404
+    return exceptions.NotFound(f'No {model._meta.object_name} matches the given query.')
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
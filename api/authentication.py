@@ -0,0 +1,117 @@
+# api/authentication.py
+
+import hmac
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from . import metrics
+
+AUTH_USER_CACHE_TIMEOUT = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+
+
+def user_cache_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_user(user):
+    """Drop the cached user once the current transaction commits."""
+    key = user_cache_key(getattr(user, api_settings.USER_ID_FIELD))
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the authenticated User, with its profile already joined,
+    in the cache for AUTH_USER_CACHE_TIMEOUT seconds. A warm request needs no query for
+    request.user or request.user.profile. Saving or deleting the user or its profile
+    drops the entry (see api.signals), so deactivation and password changes apply to
+    the next request. The is_active and revoke-token checks run on every request.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+
+        key = user_cache_key(user_id)
+        user = cache.get(key)
+        metrics.cache_lookup('auth', user is not None)
+        if user is None:
+            try:
+                user = self.user_model.objects.select_related('profile').get(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(key, user, AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user, validated_token)
+
+    async def aauthenticate(self, request):
+        """authenticate() for async views: token decoding is pure CPU, the lookups are awaited."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+
+        key = user_cache_key(user_id)
+        user = await cache.aget(key)
+        metrics.cache_lookup('auth', user is not None)
+        if user is None:
+            try:
+                user = await self.user_model.objects.select_related('profile').aget(
+                    **{api_settings.USER_ID_FIELD: user_id}
+                )
+            except self.user_model.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            await cache.aset(key, user, AUTH_USER_CACHE_TIMEOUT)
+        return self.check_user(user, validated_token)
+
+    def check_user(self, user, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+
+class MetricsTokenAuthentication(BaseAuthentication):
+    """
+    Authenticates the metrics scraper by ``Authorization: Bearer <METRICS_TOKEN>``, as an
+    anonymous user with ``request.auth == METRICS_AUTH``. Any other header is left to the
+    next authenticator, so staff can still read the metrics with their JWT.
+    """
+
+    def authenticate(self, request):
+        expected = getattr(settings, 'METRICS_TOKEN', None)
+        header = get_authorization_header(request).split()
+        if not expected or len(header) != 2 or header[0].lower() != b'bearer':
+            return None
+        if not hmac.compare_digest(header[1], expected.encode()):
+            return None
+        return AnonymousUser(), METRICS_AUTH
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="metrics"'
+
+
+METRICS_AUTH = 'metrics'
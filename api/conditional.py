@@ -0,0 +1,133 @@
+# api/conditional.py
+"""
+Conditional GET support for read-mostly viewsets.
+
+Each table a response depends on has a TableVersion counter that is bumped whenever a
+row changes (see api.signals; bulk writes call bump() themselves). The counter moves once
+the writing transaction commits, in a statement of its own, so concurrent writers don't
+queue on the counter row's lock for the rest of their transactions. The ETag of a response
+is derived from those counters, the request path and, for per-user views, the user's
+eligibility state. It is compared with If-None-Match before the queryset is evaluated
+or anything is serialized.
+"""
+
+import hashlib
+from functools import partial
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from . import eligibility
+from .models import TableVersion
+
+
+def bump(*tables):
+    """Bump the tables' versions when the current transaction commits, or now outside one."""
+    transaction.on_commit(partial(bump_now, tables))
+
+
+def bump_now(tables):
+    now = timezone.now()
+    for table in tables:
+        updated = TableVersion.objects.filter(name=table).update(version=F('version') + 1, changed_at=now)
+        if not updated:
+            TableVersion.objects.get_or_create(name=table, defaults={'version': 1})
+
+
+def version_rows(tables):
+    return TableVersion.objects.filter(name__in=tables).values_list('name', 'version', 'changed_at')
+
+
+def table_versions(tables):
+    """({table: version}, latest change time) in one query."""
+    return summarise(version_rows(tables))
+
+
+async def atable_versions(tables):
+    return summarise([row async for row in version_rows(tables)])
+
+
+def summarise(rows):
+    versions = {name: version for name, version, _ in rows}
+    changed = max((changed_at for _, _, changed_at in rows), default=None)
+    return versions, changed
+
+
+def eligibility_fingerprint(snapshot):
+    """The user's active domains and points, which decide which articles they can see."""
+    return ','.join(f'{domain}:{points}' for domain, points in sorted(snapshot.items()))
+
+
+def make_validators(request, tables, versions, changed, user=None, snapshot=None):
+    """
+    The (ETag, Last-Modified) pair of a response. Pass the user and their eligibility
+    snapshot when the representation depends on them.
+    """
+    parts = [request.get_full_path()]
+    parts.extend(f'{table}={versions.get(table, 0)}' for table in tables)
+    if user is not None:
+        parts.append(f'user={user.pk}:{eligibility_fingerprint(snapshot)}')
+        # Last-Modified can't express the user's state, so only the ETag is used
+        changed = None
+    etag = '"%s"' % hashlib.md5('|'.join(parts).encode()).hexdigest()
+    return etag, changed
+
+
+def not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match:
+        return etag in parse_etags(if_none_match) or if_none_match.strip() == '*'
+    if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+    return bool(last_modified and if_modified_since and int(last_modified.timestamp()) <= if_modified_since)
+
+
+def set_validators(response, etag, last_modified, private):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    # Let browsers keep the body but revalidate it on every fetch
+    patch_cache_control(response, no_cache=True, private=private)
+    patch_vary_headers(response, ['Authorization'])
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Adds ETag/Last-Modified validators to the list and retrieve actions and answers
+    matching If-None-Match / If-Modified-Since requests with 304 Not Modified.
+
+    version_tables lists the TableVersion names the representation depends on; set
+    per_user when the result also depends on the requesting user's eligibility.
+    """
+    version_tables = ()
+    per_user = False
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
+
+    def get_validators(self, request):
+        versions, changed = table_versions(self.version_tables)
+        if self.per_user and request.user.is_authenticated:
+            return make_validators(
+                request, self.version_tables, versions, changed,
+                request.user, eligibility.domain_points(request.user),
+            )
+        return make_validators(request, self.version_tables, versions, changed)
+
+    def conditional(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        if not_modified(request, etag, last_modified):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        return set_validators(response, etag, last_modified, self.per_user)
@@ -0,0 +1,100 @@
+# api/eligibility.py
+"""
+Per-user eligibility snapshots: the {scientific_domain_id: current_points} map of a user's
+active interests, which decides which articles they may read.
+
+Snapshots live in the 'eligibility' cache under a per-user version number. Anything that
+changes a user's points or active interests calls invalidate(), which drops the version
+once the transaction commits. The next read then starts a new version and rebuilds the
+snapshot with one query, and the old entries age out through the backend's LRU/TTL
+eviction. The cache backend is configured in settings.CACHES.
+"""
+
+import time
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from . import metrics
+from .models import UserFieldProgress
+
+CACHE_ALIAS = 'eligibility'
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def version_key(user_id):
+    return f'version:{user_id}'
+
+
+def get_version(user_id):
+    cache = get_cache()
+    version = cache.get(version_key(user_id))
+    if version is None:
+        # A fresh, never reused number, so snapshots of earlier versions can't be picked up
+        version = time.time_ns()
+        if not cache.add(version_key(user_id), version, timeout=None):
+            version = cache.get(version_key(user_id), version)
+    return version
+
+
+async def aget_version(user_id):
+    cache = get_cache()
+    version = await cache.aget(version_key(user_id))
+    if version is None:
+        version = time.time_ns()
+        if not await cache.aadd(version_key(user_id), version, timeout=None):
+            version = await cache.aget(version_key(user_id), version)
+    return version
+
+
+def invalidate(*user_ids):
+    keys = [version_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: get_cache().delete_many(keys))
+
+
+def snapshot_key(user_id, version):
+    return f'snapshot:{user_id}:{version}'
+
+
+def snapshot_query(user):
+    # Cached until the user's next version, so never filled from a lagging replica
+    return UserFieldProgress.objects.using(DEFAULT_DB_ALIAS).filter(user_profile__user=user, active=True).values_list(
+        'scientific_domain_id', 'current_points'
+    )
+
+
+def domain_points(user):
+    key = snapshot_key(user.pk, get_version(user.pk))
+    cache = get_cache()
+    snapshot = cache.get(key)
+    metrics.cache_lookup('eligibility', snapshot is not None)
+    if snapshot is None:
+        snapshot = dict(snapshot_query(user))
+        cache.set(key, snapshot)
+    return snapshot
+
+
+async def adomain_points(user):
+    key = snapshot_key(user.pk, await aget_version(user.pk))
+    cache = get_cache()
+    snapshot = await cache.aget(key)
+    metrics.cache_lookup('eligibility', snapshot is not None)
+    if snapshot is None:
+        snapshot = {domain: points async for domain, points in snapshot_query(user)}
+        await cache.aset(key, snapshot)
+    return snapshot
+
+
+def allowed(snapshot, article):
+    points = snapshot.get(article.scientific_domain_id)
+    if points is None:
+        return False
+    return article.minimum_points is None or points >= article.minimum_points
+
+
+def can_access(user, article):
+    return allowed(domain_points(user), article)
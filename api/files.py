@@ -0,0 +1,152 @@
+# api/files.py
+"""
+Serving of article files with HTTP range support.
+
+Files are streamed through Django's FileResponse. Under a WSGI server that implements
+wsgi.file_wrapper with sendfile(2) (gunicorn, uWSGI), the bytes go from the page cache to
+the socket without being copied through Python, ranges included. Alternatively,
+ARTICLE_FILE_OFFLOAD hands the transfer to the front-end web server:
+
+    'x-accel-redirect'  nginx, via an internal location mapped to ARTICLE_FILE_ACCEL_PREFIX
+    'x-sendfile'        Apache mod_xsendfile, lighttpd
+
+In offload mode the web server handles Range and If-Range itself.
+"""
+
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, HttpResponseRedirect
+from django.utils.http import content_disposition_header, http_date, parse_etags, parse_http_date_safe
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """
+    A read-only view of ``length`` bytes of an open file, starting at its current position.
+    fileno() is exposed so sendfile-capable file wrappers can still transfer the range
+    zero-copy. There is deliberately no ``name``, so FileResponse doesn't set its own
+    Content-Length from the file size.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    # Strong validator: changes whenever the file is replaced or rewritten
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def parse_range(header, size):
+    """
+    Return the (start, end) of a single byte range, inclusive. None means serve the whole
+    file (no header, or one we don't handle such as multiple ranges), False means the range
+    is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.replace(' ', '')) if header and size else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        return False
+    return start, end
+
+
+def if_range_matches(request, etag, last_modified):
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith('"'):
+        return if_range == etag
+    return parse_http_date_safe(if_range) == int(last_modified)
+
+
+def serve_article_file(request, article):
+    field = article.file
+    if not field:
+        return HttpResponse(status=404)
+    try:
+        path = field.path
+    except NotImplementedError:
+        # Remote storage: let it serve the file (and ranges) itself
+        return HttpResponseRedirect(field.url)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return HttpResponse(status=404)
+
+    etag = file_etag(stat)
+    headers = {
+        'ETag': etag,
+        'Last-Modified': http_date(stat.st_mtime),
+        'Accept-Ranges': 'bytes',
+    }
+    filename = os.path.basename(field.name)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        for header in ('ETag', 'Last-Modified'):
+            response[header] = headers[header]
+        return response
+
+    content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    offload = getattr(settings, 'ARTICLE_FILE_OFFLOAD', None)
+    if offload:
+        response = HttpResponse(content_type=content_type, headers=headers)
+        response['Content-Disposition'] = content_disposition_header(False, filename)
+        if offload == 'x-accel-redirect':
+            prefix = getattr(settings, 'ARTICLE_FILE_ACCEL_PREFIX', '/protected-media/')
+            response['X-Accel-Redirect'] = prefix + quote(field.name)
+        else:
+            response['X-Sendfile'] = path
+        return response
+
+    size = stat.st_size
+    byte_range = None
+    if if_range_matches(request, etag, stat.st_mtime):
+        byte_range = parse_range(request.headers.get('Range'), size)
+    if byte_range is False:
+        response = HttpResponse(status=416, headers=headers)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        return FileResponse(file, filename=filename, content_type=content_type, headers=headers)
+
+    start, end = byte_range
+    file.seek(start)
+    response = FileResponse(
+        FileRange(file, end - start + 1), status=206, filename=filename, content_type=content_type, headers=headers
+    )
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = end - start + 1
+    return response
@@ -0,0 +1,273 @@
+# api/instrumentation.py
+"""
+Per-request timing: SQL statements and their time, time spent serializing and rendering
+the response body, and total view time. Statements are timed by an execute_wrapper
+installed on every connection as it opens; it records into the current request's timings,
+which a context variable carries into sync_to_async threads under ASGI. Serialization is
+timed by the serializers of api.serializers, through TimedRepresentationMixin (nested
+serializers count once, as part of the outermost), and rendering by TimedJSONRenderer.
+Serialization time includes the queries it triggers, which are also counted under db.
+The same numbers feed the per-view metrics of api.metrics.
+
+The timings reveal how the database behaves, so the Server-Timing header is only sent
+when SERVER_TIMING allows it: False (the default) for nobody, 'staff' for staff users,
+True for everyone (local development).
+
+Requests slower than SLOW_REQUEST_THRESHOLD seconds are logged with their slowest and most
+repeated statements. A fraction PROFILE_SAMPLE_RATE of requests is profiled by sampling the
+stack of the thread handling them; the stacks are written in the folded format that
+flamegraph.pl, speedscope and inferno read.
+"""
+
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from rest_framework.renderers import JSONRenderer
+
+from . import metrics
+
+SERVER_TIMING = getattr(settings, 'SERVER_TIMING', False)
+METRICS = getattr(settings, 'METRICS', True)
+SLOW_REQUEST_THRESHOLD = getattr(settings, 'SLOW_REQUEST_THRESHOLD', 0.5)
+SLOW_REQUEST_QUERIES = getattr(settings, 'SLOW_REQUEST_QUERIES', 5)
+PROFILE_SAMPLE_RATE = getattr(settings, 'PROFILE_SAMPLE_RATE', 0)
+PROFILE_INTERVAL = getattr(settings, 'PROFILE_INTERVAL', 0.005)
+PROFILE_DIR = getattr(settings, 'PROFILE_DIR', os.path.join(settings.BASE_DIR, 'profiles'))
+
+logger = logging.getLogger(__name__)
+
+_timings = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        # sql -> [executions, total seconds, slowest execution]
+        self.statements = {}
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        # Set while an outermost serializer is representing an object
+        self.serializing = False
+        # Set once the URL resolves
+        self.view = 'unresolved'
+
+    def record(self, sql, elapsed):
+        self.queries += 1
+        self.sql_time += elapsed
+        stats = self.statements.setdefault(sql, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+        stats[2] = max(stats[2], elapsed)
+
+    def server_timing(self, total):
+        return (
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.queries} queries", '
+            f'serialize;dur={self.serialize_time * 1000:.1f}, '
+            f'render;dur={self.render_time * 1000:.1f}, '
+            f'view;dur={total * 1000:.1f}'
+        )
+
+    def slowest(self, count):
+        return sorted(self.statements.items(), key=lambda item: item[1][2], reverse=True)[:count]
+
+    def most_repeated(self, count):
+        repeated = [item for item in self.statements.items() if item[1][0] > 1]
+        return sorted(repeated, key=lambda item: item[1][0], reverse=True)[:count]
+
+
+class StackSampler(threading.Thread):
+    """Counts the stacks of one thread every PROFILE_INTERVAL seconds until stopped."""
+
+    def __init__(self, thread_id):
+        super().__init__(name='request-profiler', daemon=True)
+        self.thread_id = thread_id
+        self.stacks = Counter()
+        self.done = threading.Event()
+
+    def run(self):
+        while not self.done.wait(PROFILE_INTERVAL):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}:{frame.f_lineno}')
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def stop(self):
+        self.done.set()
+        self.join()
+
+    def dump(self, request):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        slug = re.sub(r'[^\w]+', '-', request.path).strip('-') or 'root'
+        path = os.path.join(PROFILE_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-{request.method}-{slug}.folded')
+        with open(path, 'w') as handle:
+            for stack, count in self.stacks.most_common():
+                handle.write(f'{stack} {count}\n')
+        return path
+
+
+class InstrumentationMiddleware:
+    """Place first in MIDDLEWARE so the view time covers the other middleware too."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, sampler, token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+            if sampler:
+                sampler.stop()
+        return self.finish(request, response, timings, sampler)
+
+    async def __acall__(self, request):
+        timings, sampler, token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+            if sampler:
+                sampler.stop()
+        return self.finish(request, response, timings, sampler)
+
+    def start(self, request):
+        timings = RequestTimings()
+        sampler = None
+        if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+            # Under ASGI this is the event loop thread; ORM work in sync_to_async threads isn't sampled
+            sampler = StackSampler(threading.get_ident())
+            sampler.start()
+        return timings, sampler, _timings.set(timings)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timings = _timings.get()
+        if timings is not None:
+            timings.view = view_name(view_func, request.method)
+
+    def finish(self, request, response, timings, sampler):
+        total = time.perf_counter() - timings.started
+        if METRICS:
+            metrics.observe_request(timings.view, request.method, response.status_code, total, timings.queries)
+        if sends_server_timing(request):
+            response['Server-Timing'] = timings.server_timing(total)
+        if sampler:
+            logger.info("Profiled %s %s: %s", request.method, request.path, sampler.dump(request))
+        if total >= SLOW_REQUEST_THRESHOLD:
+            self.log_slow(request, response, timings, total)
+        return response
+
+    def log_slow(self, request, response, timings, total):
+        lines = [
+            f"Slow request {request.method} {request.get_full_path()} -> {response.status_code}: "
+            f"{total * 1000:.0f} ms, {timings.queries} queries in {timings.sql_time * 1000:.0f} ms, "
+            f"serializing {timings.serialize_time * 1000:.0f} ms, rendering {timings.render_time * 1000:.0f} ms",
+            "slowest queries:",
+        ]
+        lines += [
+            f"  {slowest * 1000:.1f} ms (x{count}) {sql[:500]}"
+            for sql, (count, _, slowest) in timings.slowest(SLOW_REQUEST_QUERIES)
+        ]
+        repeated = timings.most_repeated(SLOW_REQUEST_QUERIES)
+        if repeated:
+            lines.append("most repeated queries:")
+            lines += [
+                f"  x{count} {spent * 1000:.1f} ms {sql[:500]}"
+                for sql, (count, spent, _) in repeated
+            ]
+        logger.warning("\n".join(lines))
+
+
+def sends_server_timing(request):
+    if SERVER_TIMING == 'staff':
+        # DRF sets the user it authenticated on the Django request too
+        user = getattr(request, 'user', None)
+        return bool(user is not None and user.is_staff)
+    return bool(SERVER_TIMING)
+
+
+class TimedRepresentationMixin:
+    """Serializer mixin that adds the time of to_representation to the request's timings."""
+
+    def to_representation(self, instance):
+        timings = _timings.get()
+        if timings is None or timings.serializing:
+            return super().to_representation(instance)
+        timings.serializing = True
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            timings.serialize_time += time.perf_counter() - started
+            timings.serializing = False
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that adds its time to the request's timings."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        timings = _timings.get()
+        if timings is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        started = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings.render_time += time.perf_counter() - started
+
+
+def view_name(view_func, method):
+    """'ArticleViewSet.list' for viewset actions, the class name for other class-based views."""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{cls.__name__}.{actions.get(method.lower(), method.lower())}'
+    return cls.__name__
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.record(sql, time.perf_counter() - started)
+
+
+def add_query_recorder(sender, connection, **kwargs):
+    # Wrappers outlive reconnections of the same connection object. Go first in the list:
+    # connection.execute_wrapper() pops the last one on exit
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def install():
+    """Record the statements of every connection."""
+    connection_created.connect(add_query_recorder, dispatch_uid='api.instrumentation')
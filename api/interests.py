@@ -0,0 +1,42 @@
+# api/interests.py
+
+from django.db import transaction
+from django.db.models.functions import Now
+
+from .eligibility import invalidate
+from .models import UserFieldProgress
+from .points import earned_points
+
+
+def set_interests(profile, domains):
+    """
+    Make ``domains`` the profile's active interests with a fixed number of statements,
+    however many domains change: one SELECT of the existing progress rows, one UPDATE
+    to deactivate, one UPDATE to reactivate, one INSERT ... ON CONFLICT for new rows, and one
+    UPDATE seeding their points from the reading history. Progress rows are soft-deleted,
+    so a re-added interest gets back the row (and points) it had before.
+    """
+    wanted = {domain.pk for domain in domains}
+    with transaction.atomic():
+        existing = dict(
+            UserFieldProgress.all_objects.filter(user_profile=profile).values_list('scientific_domain_id', 'active')
+        )
+        deactivate = [domain_id for domain_id, active in existing.items() if active and domain_id not in wanted]
+        reactivate = [domain_id for domain_id, active in existing.items() if not active and domain_id in wanted]
+        insert = wanted - existing.keys()
+
+        progress = UserFieldProgress.all_objects.filter(user_profile=profile)
+        if deactivate:
+            progress.filter(scientific_domain_id__in=deactivate).update(active=False, changed_at=Now())
+        if reactivate:
+            progress.filter(scientific_domain_id__in=reactivate).update(active=True, changed_at=Now())
+        if insert:
+            UserFieldProgress.all_objects.bulk_create(
+                [UserFieldProgress(user_profile=profile, scientific_domain_id=domain_id) for domain_id in insert],
+                update_conflicts=True,
+                unique_fields=['user_profile', 'scientific_domain'],
+                update_fields=['active', 'changed_at'],
+            )
+            progress.filter(scientific_domain_id__in=insert).update(current_points=earned_points(), changed_at=Now())
+        if deactivate or reactivate or insert:
+            invalidate(profile.user_id)
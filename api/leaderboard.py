@@ -0,0 +1,156 @@
+# api/leaderboard.py
+"""
+Per-domain leaderboards over the points ledger, UserFieldProgress.current_points, which
+api.points keeps current as articles are read. Only active rows (the domain is among the
+user's interests) take part.
+
+Each process keeps one board per domain:
+
+- The points of every participant, by UserProfile id.
+- The points distribution: the distinct point values in ascending order, plus the number
+  of rows above each value. A rank is one more than the number of rows with more points,
+  found by bisecting the values, so it takes microseconds however many users the domain has.
+- The top slice: the first TOP_SIZE rows by points, ranked with a RANK() window function
+  that reads progress_leaderboard_idx in order and stops after the slice.
+
+A board is maintained incrementally. Every LEADERBOARD_CACHE_TIMEOUT seconds it reads only
+the rows whose ledger changed since its last refresh (UserFieldProgress.changed_at, through
+progress_changed_idx) and moves them in the distribution, then reads the top slice again.
+The window read goes back LEADERBOARD_CHANGE_OVERLAP seconds further, so a row committed
+late or stamped by a clock running behind is still picked up; applying a row again is
+harmless. Only hard-deleted rows are missed, so the board is rebuilt from scratch every
+LEADERBOARD_REBUILD_INTERVAL seconds.
+
+One request refreshes a stale board, under a lock of its domain; meanwhile the other
+requests are answered from the stale board, so a slow refresh holds up no one, and other
+domains not at all. Only a domain's first board is waited for. Boards are never changed
+once published: a refresh builds a new one.
+
+Ranks are competition ranks: ties share a rank and the next rank is skipped. A user's own
+points and rank come from the same board, so they agree with each other and with the
+top slice, and are up to the timeout old.
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.functions import Rank
+from django.utils import timezone
+
+from .models import UserFieldProgress
+
+TOP_SIZE = 100
+CACHE_TIMEOUT = getattr(settings, 'LEADERBOARD_CACHE_TIMEOUT', 10)
+CHANGE_OVERLAP = timedelta(seconds=getattr(settings, 'LEADERBOARD_CHANGE_OVERLAP', 60))
+REBUILD_INTERVAL = getattr(settings, 'LEADERBOARD_REBUILD_INTERVAL', 600)
+
+_boards = {}
+# domain_id -> the lock of its refreshes
+_locks = {}
+
+
+class Board:
+    def __init__(self, top, points, synced, rebuilt):
+        # [(rank, username, points)], best first
+        self.top = top
+        # user_profile_id -> points, active rows only
+        self.points = points
+        # changed_at up to which the rows have been read, and when the board was last rebuilt
+        self.synced = synced
+        self.rebuilt = rebuilt
+        distribution = sorted(Counter(points.values()).items())
+        self.values = [value for value, _ in distribution]
+        # above[i]: rows with at least values[i] points; above[-1] is 0
+        self.above = [0] * (len(distribution) + 1)
+        for i in range(len(distribution) - 1, -1, -1):
+            self.above[i] = self.above[i + 1] + distribution[i][1]
+        self.built = time.monotonic()
+
+    @property
+    def participants(self):
+        return len(self.points)
+
+    def rank(self, points):
+        return 1 + self.above[bisect_right(self.values, points)]
+
+
+def participants(domain_id):
+    return UserFieldProgress.objects.filter(scientific_domain_id=domain_id, active=True)
+
+
+def top_slice(domain_id):
+    return list(participants(domain_id).annotate(
+        rank=Window(Rank(), order_by=F('current_points').desc())
+    ).order_by('-current_points', 'id').values_list(
+        'rank', 'user_profile__user__username', 'current_points'
+    )[:TOP_SIZE])
+
+
+def build(domain_id):
+    synced = timezone.now()
+    points = dict(participants(domain_id).values_list('user_profile_id', 'current_points'))
+    return Board(top_slice(domain_id), points, synced, time.monotonic())
+
+
+def refresh(board, domain_id):
+    """A new board with the rows changed since ``board`` was synced moved to their points."""
+    synced = timezone.now()
+    changed = UserFieldProgress.all_objects.filter(
+        scientific_domain_id=domain_id, changed_at__gte=board.synced - CHANGE_OVERLAP
+    ).values_list('user_profile_id', 'current_points', 'active')
+    points = dict(board.points)
+    for user_profile_id, current_points, active in changed:
+        if active:
+            points[user_profile_id] = current_points
+        else:
+            points.pop(user_profile_id, None)
+    return Board(top_slice(domain_id), points, synced, board.rebuilt)
+
+
+def is_stale(board):
+    return board is None or time.monotonic() - board.built > CACHE_TIMEOUT
+
+
+def get_board(domain_id):
+    board = _boards.get(domain_id)
+    if not is_stale(board):
+        return board
+    # setdefault is atomic, so every thread gets the same lock
+    lock = _locks.setdefault(domain_id, threading.Lock())
+    if not lock.acquire(blocking=board is None):
+        # Another thread is refreshing it
+        return board
+    try:
+        # Another thread may have refreshed it while this one waited
+        board = _boards.get(domain_id)
+        if board is None or time.monotonic() - board.rebuilt > REBUILD_INTERVAL:
+            board = _boards[domain_id] = build(domain_id)
+        elif is_stale(board):
+            board = _boards[domain_id] = refresh(board, domain_id)
+    finally:
+        lock.release()
+    return board
+
+
+def standings(domain_id, user, limit=10):
+    """The top ``limit`` of the domain and, if the user follows it, their own rank."""
+    board = get_board(domain_id)
+    me = None
+    if user.is_authenticated:
+        points = board.points.get(user.profile.pk)
+        if points is not None:
+            me = {'rank': board.rank(points), 'points': points}
+    return {
+        'scientific_domain': domain_id,
+        'participants': board.participants,
+        'top': [
+            {'rank': rank, 'username': username, 'points': points}
+            for rank, username, points in board.top[:limit]
+        ],
+        'me': me,
+    }
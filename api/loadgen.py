@@ -0,0 +1,101 @@
+# api/loadgen.py
+"""
+Minimal HTTP/1.1 load generator for the benchmark commands: asyncio keep-alive
+connections that send the same prepared request until a deadline. No client library is
+involved, so the client costs little next to the server being measured.
+"""
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+def build_request(base, method, path, token=None, body=None):
+    """The raw bytes of one request; ``body`` is already encoded."""
+    url = urlsplit(base)
+    headers = [f'{method} {path} HTTP/1.1', f'Host: {url.netloc}', 'Accept: application/json', 'Connection: keep-alive']
+    if token:
+        headers.append(f'Authorization: Bearer {token}')
+    if body is not None:
+        headers += ['Content-Type: application/json', f'Content-Length: {len(body)}']
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode() + (body or b'')
+
+
+async def load(base, requests, connections, duration):
+    """
+    Open ``connections`` connections; connection i repeats requests[i % len(requests)], so
+    per-user requests spread the load over several users. Returns the number of requests,
+    requests per second, latency percentiles in milliseconds and the number of errors.
+    """
+    url = urlsplit(base)
+    latencies, errors = [], [0]
+    deadline = time.perf_counter() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        client(url.hostname, url.port or 80, requests[i % len(requests)], deadline, latencies, errors)
+        for i in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50) * 1000,
+        'p95': percentile(latencies, 95) * 1000,
+        'p99': percentile(latencies, 99) * 1000,
+        'errors': errors[0],
+    }
+
+
+async def client(host, port, request, deadline, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            sent = time.perf_counter()
+            writer.write(request)
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - sent)
+            if status >= 400:
+                errors[0] += 1
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            errors[0] += 1
+            keep_alive = False
+        if not keep_alive and writer is not None:
+            writer.close()
+            reader = writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, whether the connection stays open)."""
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip().lower()
+
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    else:
+        await reader.read()
+        return status, False
+    return status, headers.get('connection') != 'close'
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
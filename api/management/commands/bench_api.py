@@ -0,0 +1,196 @@
+# api/management/commands/bench_api.py
+
+import asyncio
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadgen import build_request, load
+from api.seed import SEED_PASSWORD
+
+# (name, method, path, request body); paths and bodies are functions of one user's context.
+# Writes are limited to idempotent ones, so every run leaves the dataset as it found it:
+# registering, reviewing (one review per article) and downloading (seeded articles have no
+# file) are not benchmarked.
+ENDPOINTS = [
+    ('api-root', 'GET', lambda c: '/api/', None),
+    ('profile', 'GET', lambda c: '/api/profile/', None),
+    ('scientificdomain-list', 'GET', lambda c: '/api/scientific-domains/', None),
+    ('scientificdomain-detail', 'GET', lambda c: f'/api/scientific-domains/{c.domain}/', None),
+    ('scientificdomain-leaderboard', 'GET', lambda c: f'/api/scientific-domains/{c.domain}/leaderboard/', None),
+    ('article-list', 'GET', lambda c: '/api/articles/', None),
+    ('article-list-sparse', 'GET', lambda c: '/api/articles/?fields=title,scientific_domain', None),
+    ('article-detail', 'GET', lambda c: f'/api/articles/{c.article}/', None),
+    ('article-overview', 'GET', lambda c: f'/api/articles/{c.article}/detail/', None),
+    ('article-search', 'GET', lambda c: '/api/articles/search/?q=graphs', None),
+    ('article-top', 'GET', lambda c: f'/api/articles/top/?domain={c.domain}', None),
+    ('store-articles', 'GET', lambda c: '/api/store-articles/', None),
+    ('recommendations', 'GET', lambda c: '/api/recommendations/', None),
+    ('metrics', 'GET', lambda c: '/api/metrics/', None),
+    ('user-article-list', 'GET', lambda c: '/api/user-articles/', None),
+    ('user-article-filter', 'GET', lambda c: f'/api/user-articles/?article={c.read}', None),
+    ('user-article-detail', 'GET', lambda c: f'/api/user-articles/{c.user_article}/', None),
+    ('reviews-list', 'GET', lambda c: '/api/reviews/', None),
+    ('user-article-progress', 'POST', lambda c: f'/api/user-articles/{c.user_article}/progress/',
+     lambda c: {'page_left_off': c.page}),
+    ('user-article-patch', 'PATCH', lambda c: f'/api/user-articles/{c.user_article}/',
+     lambda c: {'page_left_off': c.page}),
+    ('user-article-create', 'POST', lambda c: '/api/user-articles/', lambda c: {'article': c.read}),
+    ('user-article-batch', 'POST', lambda c: '/api/user-articles/batch/',
+     lambda c: [{'id': c.user_article, 'page_left_off': c.page}]),
+    ('token_refresh', 'POST', lambda c: '/api/token/refresh/', lambda c: {'refresh': c.refresh}),
+    ('token_obtain_pair', 'POST', lambda c: '/api/token/',
+     lambda c: {'username': c.username, 'password': c.password}),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test every API endpoint of a running server, one endpoint at a time, with concurrent "
+        "keep-alive clients logged in as users created by seed_bench, and write requests per second "
+        "and p50/p95/p99 latency per endpoint as JSON. The report records the commit and the "
+        "parameters; pass an earlier report as --baseline to compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000', help="Base URL of the server.")
+        parser.add_argument('--connections', type=int, default=50, help="Concurrent keep-alive connections.")
+        parser.add_argument('--duration', type=float, default=10, help="Measured seconds per endpoint.")
+        parser.add_argument('--warmup', type=float, default=2, help="Unmeasured seconds before each endpoint.")
+        parser.add_argument('--users', type=int, default=20, help="Seeded users the connections are spread over.")
+        parser.add_argument('--prefix', default='bench', help="Prefix of the seeded usernames.")
+        parser.add_argument('--password', default=SEED_PASSWORD)
+        parser.add_argument('--endpoint', action='append', dest='endpoints',
+                            choices=[endpoint[0] for endpoint in ENDPOINTS], help="Only these endpoints.")
+        parser.add_argument('--output', help="Write the JSON report to this file instead of stdout.")
+        parser.add_argument('--baseline', help="An earlier JSON report to compare with.")
+        parser.add_argument('--max-regression', type=float,
+                            help="Fail when an endpoint's p95 is this many percent above the baseline.")
+
+    def handle(self, *args, **options):
+        base = options['url'].rstrip('/')
+        contexts = [
+            self.user_context(base, f"{options['prefix']}-user-{i}", options['password'])
+            for i in range(options['users'])
+        ]
+        selected = options['endpoints']
+        results = {}
+        for name, method, path, body in ENDPOINTS:
+            if selected and name not in selected:
+                continue
+            requests = [
+                build_request(base, method, path(c), c.token, None if body is None else json.dumps(body(c)).encode())
+                for c in contexts
+            ]
+            self.stderr.write(f"{name}: {options['connections']} connections for {options['duration']:g}s")
+            if options['warmup']:
+                asyncio.run(load(base, requests, options['connections'], options['warmup']))
+            stats = asyncio.run(load(base, requests, options['connections'], options['duration']))
+            results[name] = {
+                'method': method,
+                'requests': stats['requests'],
+                'rps': round(stats['rps'], 1),
+                'p50_ms': round(stats['p50'], 2),
+                'p95_ms': round(stats['p95'], 2),
+                'p99_ms': round(stats['p99'], 2),
+                'errors': stats['errors'],
+            }
+
+        report = {
+            'commit': git('rev-parse', 'HEAD'),
+            'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+            'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': settings.DATABASES['default']['ENGINE'].rsplit('.', 1)[-1],
+            'url': base,
+            'connections': options['connections'],
+            'duration': options['duration'],
+            'users': options['users'],
+            'endpoints': results,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as handle:
+                handle.write(output + '\n')
+        else:
+            self.stdout.write(output)
+        if options['baseline']:
+            self.compare(report, options['baseline'], options['max_regression'])
+
+    def user_context(self, base, username, password):
+        """Tokens and the ids the endpoint paths need, taken from the user's own data."""
+        tokens = self.fetch(base, '/api/token/', body={'username': username, 'password': password})
+        token = tokens['access']
+        articles = self.fetch(base, '/api/articles/?page_size=1&fields=id,scientific_domain', token)['results']
+        user_articles = self.fetch(base, '/api/user-articles/?page_size=1', token)['results']
+        if not articles or not user_articles:
+            raise CommandError(f"{username} has no readable articles or reading history; run seed_bench first.")
+        domains = self.fetch(base, '/api/scientific-domains/', token)
+        domains = domains['results'] if isinstance(domains, dict) else domains
+        domain_ids = {domain['name']: domain['id'] for domain in domains}
+        return SimpleNamespace(
+            username=username,
+            password=password,
+            token=token,
+            refresh=tokens['refresh'],
+            article=articles[0]['id'],
+            domain=domain_ids.get(articles[0]['scientific_domain'], domains[0]['id']),
+            user_article=user_articles[0]['id'],
+            read=user_articles[0]['article'],
+            page=user_articles[0]['page_left_off'],
+        )
+
+    def fetch(self, base, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        data = None if body is None else json.dumps(body).encode()
+        try:
+            with urlopen(Request(base + path, data=data, headers=headers)) as response:
+                return json.load(response)
+        except HTTPError as exc:
+            raise CommandError(f"{path} returned {exc.code}: {exc.read()[:200]!r}")
+        except (URLError, ValueError) as exc:
+            raise CommandError(f"Could not reach {base}: {exc}")
+
+    def compare(self, report, path, max_regression):
+        with open(path) as handle:
+            baseline = json.load(handle)
+        self.stderr.write(
+            f"\nbaseline {str(baseline.get('commit'))[:10]}, this run {str(report['commit'])[:10]}\n"
+            f"{'endpoint':<26}{'req/s':>10}{'change':>9}{'p95 ms':>10}{'change':>9}{'p99 ms':>10}{'change':>9}"
+        )
+        regressions = []
+        for name, stats in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            changes = {key: change(before[key], stats[key]) for key in ('rps', 'p95_ms', 'p99_ms')}
+            self.stderr.write(
+                f"{name:<26}{stats['rps']:>10.0f}{changes['rps']:>+8.1f}%{stats['p95_ms']:>10.1f}"
+                f"{changes['p95_ms']:>+8.1f}%{stats['p99_ms']:>10.1f}{changes['p99_ms']:>+8.1f}%"
+            )
+            if max_regression is not None and changes['p95_ms'] > max_regression:
+                regressions.append(f"{name}: p95 {before['p95_ms']} ms -> {stats['p95_ms']} ms")
+        if regressions:
+            raise CommandError("Latency regressions:\n" + "\n".join(regressions))
+
+
+def change(before, after):
+    return (after - before) / before * 100 if before else 0.0
+
+
+def git(*args):
+    try:
+        return subprocess.run(
+            ['git', *args], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,72 @@
+# api/management/commands/bench_article_serializers.py
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from api.models import Article, ScientificDomain
+from api.serializers import ArticleSerializer, ArticleListSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload size and serialization time of the full article list representation "
+        "with the compact one. The fixture is created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=10000)
+        parser.add_argument('--content-bytes', type=int, default=4000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            domains = self.create_fixture(options['articles'], options['content_bytes'])
+            # Only the fixture, whatever else the database holds
+            base = Article.objects.filter(scientific_domain__in=domains).select_related(
+                'scientific_domain'
+            ).order_by('id')
+            full = self.measure(ArticleSerializer, base, options['repeat'])
+            compact = self.measure(ArticleListSerializer, base.defer('content'), options['repeat'])
+            transaction.set_rollback(True)
+
+        for label, (size, seconds) in (('full', full), ('compact', compact)):
+            self.stdout.write(f"{label:>8}: {size / 1024:10.1f} KiB  {seconds * 1000:8.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"compact payload is {compact[0] / full[0]:.1%} of full, "
+            f"serialization {full[1] / compact[1]:.2f}x faster"
+        ))
+
+    def create_fixture(self, count, content_bytes):
+        # Not seed_bench's '<prefix>-domain-N', so both can run against the same database
+        domains = ScientificDomain.objects.bulk_create(
+            [ScientificDomain(name=f'serializer-bench-domain-{i}') for i in range(10)]
+        )
+        body = ('lorem ipsum ' * (content_bytes // 12 + 1))[:content_bytes]
+        Article.objects.bulk_create(
+            (
+                Article(
+                    scientific_domain=domains[i % len(domains)],
+                    title=f'Benchmark article {i}',
+                    content=body,
+                    number_of_pages=10 + i % 40,
+                    points=5 + i % 20,
+                    minimum_points=None if i % 3 else i % 50,
+                )
+                for i in range(count)
+            ),
+            batch_size=1000,
+        )
+        return domains
+
+    def measure(self, serializer_class, queryset, repeat):
+        """Best-of-n time to fetch, serialize and render the queryset, and the rendered size."""
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            payload = JSONRenderer().render(serializer_class(queryset.all(), many=True).data)
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return len(payload), best
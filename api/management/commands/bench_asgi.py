@@ -0,0 +1,71 @@
+# api/management/commands/bench_asgi.py
+
+import asyncio
+import json
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.loadgen import build_request, load
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the hot API endpoints on a WSGI and an ASGI deployment of the same database "
+        "and compare requests per second and latency percentiles. Start the servers first, e.g. "
+        "'gunicorn okok.wsgi -w 4 -b :8000' and 'uvicorn okok.asgi:application --workers 4 --port 8001'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--wsgi', default='http://127.0.0.1:8000', help="Base URL of the WSGI server.")
+        parser.add_argument('--asgi', default='http://127.0.0.1:8001', help="Base URL of the ASGI server.")
+        parser.add_argument('--connections', type=int, default=500, help="Concurrent keep-alive connections.")
+        parser.add_argument('--duration', type=float, default=30, help="Seconds per endpoint and server.")
+        parser.add_argument('--username', required=True)
+        parser.add_argument('--password', required=True)
+
+    def handle(self, *args, **options):
+        results = {}
+        for label in ('wsgi', 'asgi'):
+            base = options[label].rstrip('/')
+            token = self.obtain_token(base, options['username'], options['password'])
+            for name, method, path, body in self.endpoints(base, token):
+                self.stdout.write(f"{label} {name}: {options['connections']} connections for {options['duration']:g}s")
+                request = build_request(base, method, path, token, body)
+                results[label, name] = asyncio.run(load(base, [request], options['connections'], options['duration']))
+
+        self.stdout.write(f"\n{'endpoint':<16}{'server':<8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for (label, name), stats in sorted(results.items(), key=lambda item: (item[0][1], item[0][0])):
+            self.stdout.write(
+                f"{name:<16}{label:<8}{stats['rps']:>10.0f}{stats['p50']:>10.1f}{stats['p99']:>10.1f}{stats['errors']:>8}"
+            )
+
+    def obtain_token(self, base, username, password):
+        request = Request(
+            f'{base}/api/token/', data=json.dumps({'username': username, 'password': password}).encode(),
+            headers={'Content-Type': 'application/json'},
+        )
+        try:
+            with urlopen(request) as response:
+                return json.load(response)['access']
+        except (URLError, KeyError, ValueError) as exc:
+            raise CommandError(f"Could not obtain a token from {base}: {exc}")
+
+    def endpoints(self, base, token):
+        """(name, method, path, body); detail and progress targets are taken from the user's own data."""
+        endpoints = [('article-list', 'GET', '/api/articles/', None), ('profile', 'GET', '/api/profile/', None)]
+        articles = self.fetch(base, '/api/articles/?page_size=1&fields=id', token)['results']
+        if articles:
+            endpoints.append(('article-detail', 'GET', f"/api/articles/{articles[0]['id']}/", None))
+        user_articles = self.fetch(base, '/api/user-articles/?page_size=1', token)['results']
+        if user_articles:
+            user_article = user_articles[0]
+            body = json.dumps({'page_left_off': user_article['page_left_off']}).encode()
+            endpoints.append(('progress-patch', 'PATCH', f"/api/user-articles/{user_article['id']}/", body))
+        return endpoints
+
+    def fetch(self, base, path, token):
+        with urlopen(Request(base + path, headers={'Authorization': f'Bearer {token}'})) as response:
+            return json.load(response)
+
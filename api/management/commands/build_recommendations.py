@@ -0,0 +1,40 @@
+# api/management/commands/build_recommendations.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+
+class Command(BaseCommand):
+    help = "Rebuild the item-item article similarity table used by /api/recommendations/."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--incremental', action='store_true',
+            help="Only refresh articles whose interactions changed since the last build."
+        )
+        parser.add_argument('--since', help="ISO timestamp overriding the last build time in incremental mode.")
+        parser.add_argument('--neighbours', type=int, default=20, help="Neighbours stored per article.")
+        parser.add_argument('--block-size', type=int, default=512, help="Articles per similarity block.")
+
+    def handle(self, *args, **options):
+        try:
+            from api import recommendations
+        except ImportError as exc:
+            raise CommandError(f"build_recommendations requires numpy and scipy ({exc}).")
+
+        started = time.perf_counter()
+        if options['incremental']:
+            since = None
+            if options['since']:
+                since = parse_datetime(options['since'])
+                if since is None:
+                    raise CommandError(f"Invalid --since timestamp: {options['since']}")
+            count = recommendations.refresh(since, options['neighbours'], options['block_size'])
+        else:
+            count = recommendations.rebuild(options['neighbours'], options['block_size'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Computed neighbours for {count} articles in {time.perf_counter() - started:.1f}s."
+        ))
@@ -0,0 +1,137 @@
+# api/management/commands/import_articles.py
+
+import csv
+import json
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.conditional import bump
+from api.models import Article, ScientificDomain
+
+FIELDS = ('title', 'content', 'number_of_pages', 'points', 'minimum_points')
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream articles from a CSV or JSONL file into the database in batches. Each row needs "
+        "scientific_domain (a name), title, content, number_of_pages, points and optionally "
+        "minimum_points. Unknown domains are created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('csv', 'jsonl'), help="Defaults to the file extension.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT and per transaction.")
+        parser.add_argument(
+            '--resume', action='store_true',
+            help="Skip the rows committed by a previous run, as recorded in <path>.progress."
+        )
+        parser.add_argument('--strict', action='store_true', help="Abort on the first invalid row.")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist.")
+        fmt = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        checkpoint = f'{path}.progress'
+        skip = self.read_checkpoint(checkpoint) if options['resume'] else 0
+        if skip:
+            self.stdout.write(f"Resuming after row {skip}.")
+
+        self.domains = dict(ScientificDomain.objects.values_list('name', 'id'))
+        self.exclude = [field.name for field in Article._meta.fields if field.name not in FIELDS]
+        self.strict = options['strict']
+        imported = invalid = 0
+        position = skip
+        started = time.perf_counter()
+
+        batch = []
+        for line, row in self.read_rows(path, fmt, skip):
+            article = self.build(line, row)
+            if article is None:
+                invalid += 1
+            else:
+                batch.append(article)
+            position = line
+            if len(batch) >= options['batch_size']:
+                imported += self.flush(batch, checkpoint, position)
+                batch = []
+                self.report(imported, invalid, started)
+        # Invalid rows at the tail still advance the checkpoint
+        imported += self.flush(batch, checkpoint, position)
+        self.report(imported, invalid, started)
+
+        os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} articles, skipped {invalid} invalid rows."))
+
+    def read_rows(self, path, fmt, skip):
+        """Yield (row number, dict) lazily, starting after the first ``skip`` data rows."""
+        with open(path, newline='', encoding='utf-8') as handle:
+            if fmt == 'csv':
+                rows = csv.DictReader(handle)
+            else:
+                # Decoded in build() so a malformed line is reported like any invalid row
+                rows = (text for text in handle if text.strip())
+            for line, row in enumerate(rows, start=1):
+                if line > skip:
+                    yield line, row
+
+    def build(self, line, row):
+        try:
+            if isinstance(row, str):
+                row = json.loads(row)
+            name = (row.get('scientific_domain') or '').strip()
+            if not name:
+                raise ValidationError({'scientific_domain': ["This field is required."]})
+            article = Article(**{
+                field: row.get(field) if row.get(field) not in ('', None) else None
+                for field in FIELDS
+            })
+            article.clean_fields(exclude=self.exclude)
+        except (ValidationError, TypeError, ValueError, AttributeError) as exc:
+            if self.strict:
+                raise CommandError(f"Row {line}: {exc}")
+            self.stderr.write(f"Row {line} skipped: {exc}")
+            return None
+        # Resolved to an id when the batch is flushed
+        article._domain_name = name
+        return article
+
+    def flush(self, batch, checkpoint, position):
+        with transaction.atomic():
+            missing = {a._domain_name for a in batch} - self.domains.keys()
+            if missing:
+                ScientificDomain.objects.bulk_create(
+                    [ScientificDomain(name=name) for name in missing], ignore_conflicts=True
+                )
+                self.domains.update(
+                    ScientificDomain.objects.filter(name__in=missing).values_list('name', 'id')
+                )
+            for article in batch:
+                article.scientific_domain_id = self.domains[article._domain_name]
+            Article.objects.bulk_create(batch)
+            # bulk_create sends no signals
+            bump('article', 'scientificdomain')
+        self.write_checkpoint(checkpoint, position)
+        return len(batch)
+
+    def read_checkpoint(self, checkpoint):
+        try:
+            with open(checkpoint) as handle:
+                return int(handle.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def write_checkpoint(self, checkpoint, position):
+        with open(checkpoint, 'w') as handle:
+            handle.write(str(position))
+
+    def report(self, imported, invalid, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{imported} imported, {invalid} invalid, {imported / elapsed if elapsed else 0:.0f} rows/s"
+        )
@@ -0,0 +1,38 @@
+# api/management/commands/reconcile_points.py
+
+from django.core.management.base import BaseCommand
+
+from api.models import UserFieldProgress
+from api.points import reconcile
+
+
+class Command(BaseCommand):
+    help = "Recompute UserFieldProgress.current_points from read articles and repair any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without repairing it.")
+        parser.add_argument('--user', help="Only reconcile the progress of this username.")
+
+    def handle(self, *args, **options):
+        queryset = UserFieldProgress.all_objects.all()
+        if options['user']:
+            queryset = queryset.filter(user_profile__user__username=options['user'])
+
+        checked = drifted = 0
+        for chunk_checked, chunk_drifted in reconcile(
+            queryset, chunk_size=options['chunk_size'], fix=not options['dry_run']
+        ):
+            checked += chunk_checked
+            drifted += len(chunk_drifted)
+            for progress in chunk_drifted:
+                self.stdout.write(
+                    f"progress {progress.pk}: stored {progress.current_points}, expected {progress.expected}"
+                    if options['dry_run'] else
+                    f"progress {progress.pk}: repaired to {progress.expected}"
+                )
+            if options['verbosity'] > 1:
+                self.stdout.write(f"checked {checked} rows")
+
+        verb = "found" if options['dry_run'] else "repaired"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} progress rows, {verb} {drifted} drifted."))
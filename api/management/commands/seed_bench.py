@@ -0,0 +1,63 @@
+# api/management/commands/seed_bench.py
+
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from api.seed import SEED_PASSWORD, seed
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill the database with a benchmark dataset: domains, articles, users with profiles and "
+        "interests, reading history, reviews and similarities, written with bulk inserts. Article "
+        "popularity and domain sizes are Zipf distributed and reading activity is heavy-tailed. "
+        "The same options and --seed always produce the same data, so benchmark runs on "
+        f"different commits are comparable. Every user's password is '{SEED_PASSWORD}'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--domains', type=int, default=20)
+        parser.add_argument('--articles', type=int, default=10000)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--reads-per-user', type=int, default=30, help="Mean reading history length.")
+        parser.add_argument('--interests-per-user', type=int, default=3, help="Mean number of interests.")
+        parser.add_argument('--review-ratio', type=float, default=0.4, help="Share of read articles reviewed.")
+        parser.add_argument('--skew', type=float, default=1.0, help="Zipf exponent of popularity; 0 is uniform.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed.")
+        parser.add_argument('--prefix', default='bench', help="Prefix of the generated names.")
+        parser.add_argument('--batch-size', type=int, default=2000, help="Rows per INSERT.")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=f'{prefix}-user-').exists():
+            raise CommandError(f"A dataset with the prefix '{prefix}' already exists; choose another --prefix.")
+        if min(options['domains'], options['articles'], options['users']) < 1:
+            raise CommandError("--domains, --articles and --users must be at least 1.")
+
+        started = time.perf_counter()
+        with transaction.atomic():
+            dataset = seed(
+                users=options['users'],
+                articles=options['articles'],
+                domains=options['domains'],
+                reads_per_user=options['reads_per_user'],
+                interests_per_user=options['interests_per_user'],
+                review_ratio=options['review_ratio'],
+                skew=options['skew'],
+                prefix=prefix,
+                batch_size=options['batch_size'],
+                rng=random.Random(options['seed']),
+                progress=self.progress if options['verbosity'] > 1 else None,
+            )
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(dataset.domains)} domains, {len(dataset.articles)} articles and "
+            f"{len(dataset.users)} users in {elapsed:.1f}s."
+        ))
+
+    def progress(self, message):
+        self.stdout.write(message)
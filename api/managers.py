@@ -1,4 +1,7 @@
+from django.apps import apps
 from django.db import models
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Coalesce
 
 class ActiveQuerySet(models.QuerySet):
     def delete(self, *args, **kwargs):
@@ -13,3 +16,28 @@ class ActiveManager(models.Manager):
 class SoftDeleteManager(models.Manager):
     def get_queryset(self):
         return ActiveQuerySet(self.model, using=self._db)
+
+
+class ArticleQuerySet(models.QuerySet):
+    def _user_progress(self, user):
+        UserFieldProgress = apps.get_model('api', 'UserFieldProgress')
+        return UserFieldProgress.objects.filter(
+            user_profile__user=user,
+            active=True,
+            scientific_domain=OuterRef('scientific_domain_id')
+        )
+
+    def eligible_for(self, user):
+        """
+        Articles in the user's active domains whose minimum_points the user has reached,
+        resolved with a single correlated subquery against the points ledger.
+        """
+        return self.filter(Exists(
+            self._user_progress(user).filter(current_points__gte=Coalesce(OuterRef('minimum_points'), 0))
+        ))
+
+    def locked_for(self, user):
+        """Articles in the user's active domains that still need more points to unlock."""
+        return self.filter(Exists(
+            self._user_progress(user).filter(current_points__lt=OuterRef('minimum_points'))
+        ))
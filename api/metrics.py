@@ -0,0 +1,271 @@
+# api/metrics.py
+"""
+Request metrics in the Prometheus text format, served at /api/metrics/ to staff and to
+scrapers holding METRICS_TOKEN (see api.permissions.IsMetricsClient).
+
+Each process keeps counters and histograms in plain dicts behind one lock that is only
+held for a few additions per request. With METRICS_DIR set (one directory shared by all
+workers of a deployment), a daemon thread writes this process's totals to
+METRICS_DIR/metrics-<pid>.json every METRICS_FLUSH_INTERVAL seconds and once more at exit,
+and the endpoint adds up every file, so a scrape sees the whole deployment whichever
+worker answers it. Without METRICS_DIR the endpoint reports the answering process only.
+
+Counters must never go backwards, so the totals of exited workers are kept, but not under
+their pid, which the system hands out again. Before its first write a process folds the
+files of dead processes, and any file already carrying its own pid, into
+metrics-archive.json and removes them. Liveness is checked by pid, so METRICS_DIR must
+be local to the host, as for prometheus_client's multiprocess mode.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:
+    # Windows, where os.kill(pid, 0) would end the process: files are never archived there
+    fcntl = None
+
+METRICS_DIR = getattr(settings, 'METRICS_DIR', None)
+FLUSH_INTERVAL = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+ARCHIVE = 'metrics-archive.json'
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'api_requests_total': ('counter', "Requests by view, method and status class.", None),
+    'api_request_duration_seconds': (
+        'histogram', "Time from the first middleware to the response, by view.",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    ),
+    'api_request_queries': (
+        'histogram', "SQL statements per request, by view.", (0, 1, 2, 3, 5, 10, 20, 50, 100),
+    ),
+    'api_cache_requests_total': ('counter', "Lookups of the application caches by cache and result.", None),
+}
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# (name, labels) -> value; labels is a tuple of (label, value) pairs
+_counters = defaultdict(float)
+# (name, labels) -> [count per bucket..., count, sum]
+_histograms = {}
+_flusher = None
+_archived = False
+
+
+def increment(name, labels, value=1):
+    with _lock:
+        _counters[name, labels] += value
+    start_flusher()
+
+
+def observe(name, labels, value):
+    buckets = METRICS[name][2]
+    index = bisect_left(buckets, value)
+    with _lock:
+        histogram = _histograms.get((name, labels))
+        if histogram is None:
+            histogram = _histograms[name, labels] = [0] * (len(buckets) + 2)
+        if index < len(buckets):
+            histogram[index] += 1
+        histogram[-2] += 1
+        histogram[-1] += value
+    start_flusher()
+
+
+def observe_request(view, method, status, duration, queries):
+    labels = (('view', view),)
+    increment('api_requests_total', (('view', view), ('method', method), ('status', f'{status // 100}xx')))
+    observe('api_request_duration_seconds', labels, duration)
+    observe('api_request_queries', labels, queries)
+
+
+def cache_lookup(cache, hit):
+    increment('api_cache_requests_total', (('cache', cache), ('result', 'hit' if hit else 'miss')))
+
+
+def snapshot():
+    with _lock:
+        return {
+            'counters': [[name, labels, value] for (name, labels), value in _counters.items()],
+            'histograms': [[name, labels, list(values)] for (name, labels), values in _histograms.items()],
+        }
+
+
+def collect():
+    """This process's metrics plus, with METRICS_DIR, those the other processes have written."""
+    snapshots = [snapshot()]
+    if METRICS_DIR:
+        own = metrics_path()
+        for path in glob.glob(os.path.join(METRICS_DIR, 'metrics-*.json')):
+            if path == own:
+                continue
+            data = read(path)
+            if data is not None:
+                snapshots.append(data)
+    return merge(snapshots)
+
+
+def merge(snapshots):
+    counters, histograms = defaultdict(float), {}
+    for data in snapshots:
+        for name, labels, value in data['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        for name, labels, values in data['histograms']:
+            key = name, tuple(map(tuple, labels))
+            total = histograms.setdefault(key, [0] * len(values))
+            for i, value in enumerate(values):
+                total[i] += value
+    return counters, histograms
+
+
+def read(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        # Gone, or being replaced; it's complete again on the next scrape
+        return None
+
+
+def render():
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, description, buckets) in METRICS.items():
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {kind}']
+        if kind == 'counter':
+            lines += [
+                f'{name}{format_labels(labels)} {format_value(value)}'
+                for (metric, labels), value in sorted(counters.items()) if metric == name
+            ]
+            continue
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip((*buckets, '+Inf'), (*values[:len(buckets)], values[-2])):
+                cumulative = count if bound == '+Inf' else cumulative + count
+                lines.append(f'{name}_bucket{format_labels(labels + (("le", format_value(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{format_labels(labels)} {format_value(values[-1])}')
+            lines.append(f'{name}_count{format_labels(labels)} {values[-2]}')
+
+    lines += ['# HELP api_cache_hit_ratio Share of cache lookups that were hits.', '# TYPE api_cache_hit_ratio gauge']
+    lookups = defaultdict(lambda: [0, 0])
+    for (metric, labels), value in counters.items():
+        if metric == 'api_cache_requests_total':
+            labels = dict(labels)
+            lookups[labels['cache']][labels['result'] == 'hit'] += value
+    for cache, (misses, hits) in sorted(lookups.items()):
+        lines.append(f'api_cache_hit_ratio{format_labels((("cache", cache),))} {format_value(hits / (hits + misses))}')
+    return '\n'.join(lines) + '\n'
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        (label, str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+        for label, value in labels
+    )
+    return '{' + ','.join(f'{label}="{value}"' for label, value in escaped) + '}'
+
+
+def format_value(value):
+    if isinstance(value, str):
+        return value
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+def metrics_path():
+    return os.path.join(METRICS_DIR, f'metrics-{os.getpid()}.json')
+
+
+def write_json(path, data):
+    # Readers must never see a half-written file
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as handle:
+        json.dump(data, handle)
+    os.replace(temporary, path)
+
+
+def write():
+    global _archived
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    if not _archived:
+        archive_dead()
+        _archived = True
+    write_json(metrics_path(), snapshot())
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Alive, under another user
+        return True
+    return True
+
+
+def archive_dead():
+    """
+    Fold the files of exited processes, and a file left under this process's pid by an
+    earlier owner of the pid, into the archive. Holds an exclusive lock on the archive so
+    workers starting together don't fold the same file twice.
+    """
+    if fcntl is None:
+        return
+    own = os.getpid()
+    with open(os.path.join(METRICS_DIR, 'archive.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        dead = []
+        for path in glob.glob(os.path.join(METRICS_DIR, 'metrics-*.json')):
+            pid = os.path.basename(path)[len('metrics-'):-len('.json')]
+            if pid.isdigit() and (int(pid) == own or not is_alive(int(pid))):
+                dead.append(path)
+        if not dead:
+            return
+        archive = os.path.join(METRICS_DIR, ARCHIVE)
+        snapshots = [data for data in map(read, [archive, *dead]) if data is not None]
+        counters, histograms = merge(snapshots)
+        write_json(archive, {
+            'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+            'histograms': [[name, labels, values] for (name, labels), values in histograms.items()],
+        })
+        for path in dead:
+            os.remove(path)
+
+
+def run_flusher():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            write()
+        except Exception:
+            logger.exception("Writing metrics failed")
+
+
+def start_flusher():
+    global _flusher
+    if not METRICS_DIR or (_flusher is not None and _flusher.is_alive()):
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=run_flusher, name='metrics-flusher', daemon=True)
+            _flusher.start()
+
+
+atexit.register(write)
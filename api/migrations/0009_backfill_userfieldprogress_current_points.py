@@ -0,0 +1,27 @@
+from django.db import migrations
+from django.db.models import OuterRef, PositiveIntegerField, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_current_points(apps, schema_editor):
+    UserArticle = apps.get_model('api', 'UserArticle')
+    UserFieldProgress = apps.get_model('api', 'UserFieldProgress')
+    total = UserArticle.objects.filter(
+        user__profile=OuterRef('user_profile_id'),
+        article__scientific_domain=OuterRef('scientific_domain_id'),
+        status='read',
+    ).order_by().values('user').annotate(total=Sum('article__points')).values('total')[:1]
+    UserFieldProgress.objects.update(
+        current_points=Coalesce(Subquery(total), Value(0), output_field=PositiveIntegerField())
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_remove_article_file_path_article_file'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_current_points, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+from django.db import migrations
+
+POSTGRESQL_FORWARD = [
+    """
+    ALTER TABLE api_article ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    "CREATE INDEX api_article_search_vector_idx ON api_article USING gin (search_vector)",
+]
+POSTGRESQL_REVERSE = [
+    "ALTER TABLE api_article DROP COLUMN search_vector",
+]
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE api_article_fts USING fts5(
+        title, content, content='api_article', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER api_article_fts_insert AFTER INSERT ON api_article BEGIN
+        INSERT INTO api_article_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER api_article_fts_delete AFTER DELETE ON api_article BEGIN
+        INSERT INTO api_article_fts(api_article_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER api_article_fts_update AFTER UPDATE OF title, content ON api_article BEGIN
+        INSERT INTO api_article_fts(api_article_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO api_article_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    "INSERT INTO api_article_fts(api_article_fts) VALUES ('rebuild')",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS api_article_fts_insert",
+    "DROP TRIGGER IF EXISTS api_article_fts_delete",
+    "DROP TRIGGER IF EXISTS api_article_fts_update",
+    "DROP TABLE IF EXISTS api_article_fts",
+]
+
+
+def run(statements):
+    def operation(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_review_user_recent_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'postgresql': POSTGRESQL_FORWARD, 'sqlite': SQLITE_FORWARD}),
+            run({'postgresql': POSTGRESQL_REVERSE, 'sqlite': SQLITE_REVERSE}),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:36
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, FloatField, OuterRef, PositiveIntegerField, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+
+
+def backfill_review_stats(apps, schema_editor):
+    Article = apps.get_model('api', 'Article')
+    Review = apps.get_model('api', 'Review')
+    prior_mean = getattr(settings, 'REVIEW_PRIOR_MEAN', 5.0)
+    prior_weight = getattr(settings, 'REVIEW_PRIOR_WEIGHT', 5)
+
+    reviews = Review.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    count = Coalesce(Subquery(reviews.annotate(n=Count('pk')).values('n')), Value(0),
+                     output_field=PositiveIntegerField())
+    score_sum = Coalesce(Subquery(reviews.annotate(total=Sum('score')).values('total')), Value(0),
+                         output_field=PositiveIntegerField())
+    Article.objects.filter(pk__in=Review.objects.values('article')).update(
+        review_count=count,
+        review_score_sum=score_sum,
+        review_rating=(Value(prior_weight * prior_mean) + Cast(score_sum, FloatField()))
+        / (Value(float(prior_weight)) + Cast(count, FloatField())),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_article_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='review_rating',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='review_score_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['scientific_domain', '-review_rating', 'id'], name='article_domain_rating_idx'),
+        ),
+        migrations.RunPython(backfill_review_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_table_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['scientific_domain', 'minimum_points'], name='article_domain_minimum_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['article', 'score'], name='review_article_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userarticle',
+            index=models.Index(fields=['user', 'status'], name='userarticle_user_status_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0015_query_budget_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userfieldprogress',
+            index=models.Index(condition=models.Q(('active', True)), fields=['scientific_domain', '-current_points'], name='progress_leaderboard_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:21
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0016_leaderboard_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='articlesimilarity',
+            name='computed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
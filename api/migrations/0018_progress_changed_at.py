@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0017_similarity_computed_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userfieldprogress',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='userfieldprogress',
+            index=models.Index(fields=['scientific_domain', 'changed_at'], name='progress_changed_idx'),
+        ),
+    ]
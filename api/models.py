@@ -1,8 +1,8 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
-from django.db.models import Sum
+from django.utils import timezone
 
-from api.managers import ActiveManager, SoftDeleteManager
+from api.managers import ActiveManager, SoftDeleteManager, ArticleQuerySet
 
 
 class ScientificDomain(models.Model):
@@ -17,18 +17,49 @@ class UserProfile(models.Model):
         ScientificDomain, through='UserFieldProgress', related_name='interested_users', blank=True
     )
 
+    @property
+    def active_interests(self):
+        # preferred_fields also contains soft-deleted interests
+        return ScientificDomain.objects.filter(
+            userfieldprogress__user_profile=self, userfieldprogress__active=True
+        )
+
+    @property
+    def progress_with_domains(self):
+        return self.field_progress.select_related('scientific_domain')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._saved_values = instance.concrete_values()
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_values = self.concrete_values()
+
+    def concrete_values(self):
+        # Deferred fields are left out rather than fetched
+        return {
+            field.attname: self.__dict__[field.attname]
+            for field in self._meta.concrete_fields if field.attname in self.__dict__
+        }
+
+    def has_changed(self):
+        return self._state.adding or getattr(self, '_saved_values', None) != self.concrete_values()
+
     def __str__(self):
         return f"{self.user.username}'s profile"
 
 class UserFieldProgress(models.Model):
     user_profile = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='field_progress')
     scientific_domain = models.ForeignKey(ScientificDomain, on_delete=models.CASCADE)
-    # current_points = models.PositiveIntegerField(default=0)
+    # Ledger of points earned from read articles in this domain, kept current by api.points
+    current_points = models.PositiveIntegerField(default=0)
     active = models.BooleanField(default=True)
-
-    @property
-    def current_points(self):
-        return UserArticle.objects.filter(user=self.user_profile.user, article__scientific_domain=self.scientific_domain, status="read").aggregate(total_points=Sum("article__points"))["total_points"] or 0
+    # Last change of current_points or active; the leaderboards read the rows changed since
+    # their last refresh (api/leaderboard.py), so queryset updates of either set it too
+    changed_at = models.DateTimeField(auto_now=True)
 
     objects = SoftDeleteManager()
     active_objects = ActiveManager()
@@ -36,12 +67,20 @@ class UserFieldProgress(models.Model):
 
     class Meta:
         unique_together = ('user_profile', 'scientific_domain')
+        indexes = [
+            # Leaderboards (api/leaderboard.py): active rows of a domain by points
+            models.Index(
+                fields=['scientific_domain', '-current_points'], condition=models.Q(active=True),
+                name='progress_leaderboard_idx',
+            ),
+            models.Index(fields=['scientific_domain', 'changed_at'], name='progress_changed_idx'),
+        ]
 
     def delete(self, *args, **kwargs):
         if kwargs.pop('hard', False):
             return super().delete(*args, **kwargs)
         self.active = False
-        self.save(update_fields=('active',))
+        self.save(update_fields=('active', 'changed_at'))
         return (0, {self._meta.model_name: 0})
 
     def __str__(self):
@@ -57,6 +96,19 @@ class Article(models.Model):
     points = models.PositiveIntegerField()
     minimum_points = models.PositiveIntegerField(null=True, blank=True)
     file = models.FileField(upload_to='articles/', null=True, blank=True)
+    # Review statistics, maintained incrementally by api.ratings
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    review_score_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_rating = models.FloatField(default=0, editable=False)
+
+    objects = ArticleQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['scientific_domain', '-review_rating', 'id'], name='article_domain_rating_idx'),
+            # Eligibility filters: domain equality plus a minimum_points range
+            models.Index(fields=['scientific_domain', 'minimum_points'], name='article_domain_minimum_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -72,9 +124,20 @@ class UserArticle(models.Model):
     article = models.ForeignKey(Article, related_name='user_articles', on_delete=models.CASCADE)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES)
     page_left_off = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('user', 'article')
+        indexes = [
+            # A user's read articles, as summed by the points ledger
+            models.Index(fields=['user', 'status'], name='userarticle_user_status_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # The points signals lock the stored row in pre_save and credit the change in
+        # post_save; the lock has to last until both are committed
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.user.username} - {self.article.title} - {self.status}"
@@ -85,9 +148,43 @@ class Review(models.Model):
     # Score out of 10, with default 0
     score = models.PositiveSmallIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         unique_together = ('user', 'article')
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id'], name='review_user_recent_idx'),
+            # Covers the per-article COUNT/SUM of api.ratings without visiting the table
+            models.Index(fields=['article', 'score'], name='review_article_score_idx'),
+        ]
 
     def __str__(self):
         return f"Review by {self.user.username} on {self.article.title} - Score: {self.score}"
+
+
+class ArticleSimilarity(models.Model):
+    """Precomputed item-item neighbours, rebuilt by the build_recommendations command."""
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='neighbours')
+    neighbour = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='neighbour_of')
+    score = models.FloatField()
+    # When the build that produced the row started; api.recommendations.refresh resumes from it
+    computed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('article', 'neighbour')
+        indexes = [
+            models.Index(fields=['article', '-score'], name='similarity_article_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.article_id} -> {self.neighbour_id}: {self.score:.3f}"
+
+
+class TableVersion(models.Model):
+    """Change counter per table, the cheap validator behind conditional GETs (see api.conditional)."""
+    name = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
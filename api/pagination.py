@@ -0,0 +1,107 @@
+# api/pagination.py
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the primary key. Pages are fetched with
+    "WHERE id > <cursor> ORDER BY id LIMIT n", never a COUNT(*) or OFFSET scan,
+    so the thousandth page costs the same as the first.
+
+    CursorPagination.paginate_queryset is split around its single query, so async views
+    can run the same pagination with apaginate_queryset.
+    """
+    ordering = 'id'
+    page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    def paginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.paginate_results(list(window))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        window = self.page_window(queryset, request, view)
+        if window is None:
+            return None
+        return self.paginate_results([obj async for obj in window])
+
+    def page_window(self, queryset, request, view=None):
+        """The queryset of the requested page plus one row, which tells whether another page follows."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            is_reversed = order.startswith('-')
+            order_attr = order.lstrip('-')
+            # (cursor reversed) XOR (queryset reversed)
+            if self.cursor.reverse != is_reversed:
+                queryset = queryset.filter(**{order_attr + '__lt': current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + '__gt': current_position})
+
+        self.offset, self.reverse, self.current_position = offset, reverse, current_position
+        return queryset[offset:offset + self.page_size + 1]
+
+    def paginate_results(self, results):
+        offset, reverse, current_position = self.offset, self.reverse, self.current_position
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            # The query ran in reverse order, so the page is flipped back
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None or offset > 0
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None or offset > 0
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class RecentKeysetPagination(KeysetPagination):
+    """Newest first; rows sharing a created_at are ordered by id so cursors stay stable."""
+    ordering = ('-created_at', '-id')
+
+
+class SearchPagination(KeysetPagination):
+    """Best match first; the rounded rank is the cursor and id breaks ties."""
+    ordering = ('-rank', 'id')
@@ -1,7 +1,8 @@
 # permissions.py
 
 from rest_framework import permissions
-from .models import UserFieldProgress
+from . import eligibility
+from .authentication import METRICS_AUTH
 
 class CanAccessArticle(permissions.BasePermission):
     """
@@ -15,16 +16,14 @@ class CanAccessArticle(permissions.BasePermission):
         if not user.is_authenticated:
             return False
 
-        try:
-            progress = UserFieldProgress.active_objects.get(
-                user_profile=user.profile,
-                scientific_domain=obj.scientific_domain
-            )
-            if obj.minimum_points is not None:
-                return progress.current_points >= obj.minimum_points
-            return True  # No minimum points required
-        except UserFieldProgress.DoesNotExist:
-            return False  # No active progress in the scientific domain
-
+        # Answered from the cached eligibility snapshot, no query when it is warm
+        return eligibility.can_access(user, obj)
 
+class IsMetricsClient(permissions.BasePermission):
+    """
+    Allow the scraper holding METRICS_TOKEN (see MetricsTokenAuthentication) and staff users.
+    Client addresses are not trusted: behind a reverse proxy every request comes from it.
+    """
 
+    def has_permission(self, request, view):
+        return request.auth == METRICS_AUTH or bool(request.user and request.user.is_staff)
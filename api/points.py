@@ -0,0 +1,158 @@
+# api/points.py
+
+from django.db import transaction
+from django.db.models import F, OuterRef, PositiveIntegerField, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .eligibility import invalidate
+from .models import UserArticle, UserFieldProgress
+
+# Marker stored on an instance in pre_save when the save cannot change its points contribution
+UNCHANGED = object()
+
+USER_ARTICLE_POINT_FIELDS = frozenset({'user', 'user_id', 'article', 'article_id', 'status'})
+ARTICLE_POINT_FIELDS = frozenset({'points', 'scientific_domain', 'scientific_domain_id'})
+
+
+def earned_points():
+    """
+    Expression computing, for an outer UserFieldProgress row, the points of every article
+    the user has read in that domain. This is the source of truth the ledger is kept equal to.
+    """
+    total = UserArticle.objects.filter(
+        user__profile=OuterRef('user_profile_id'),
+        article__scientific_domain=OuterRef('scientific_domain_id'),
+        status='read',
+    ).order_by().values('user').annotate(total=Sum('article__points')).values('total')[:1]
+    return Coalesce(Subquery(total), Value(0), output_field=PositiveIntegerField())
+
+
+def add_points(progress_queryset, delta):
+    if delta:
+        progress_queryset.update(current_points=Greatest(F('current_points') + delta, 0), changed_at=Now())
+
+
+def credit_user(user_id, domain_id, delta):
+    add_points(
+        UserFieldProgress.all_objects.filter(user_profile__user_id=user_id, scientific_domain_id=domain_id),
+        delta
+    )
+    invalidate(user_id)
+
+
+def credit_readers(article_id, domain_id, delta):
+    """Apply a points change to every user who has read the given article."""
+    if not delta:
+        return
+    invalidate(*UserArticle.objects.filter(article_id=article_id, status='read').values_list('user_id', flat=True))
+    add_points(
+        UserFieldProgress.all_objects.filter(
+            scientific_domain_id=domain_id,
+            user_profile__user__user_articles__article_id=article_id,
+            user_profile__user__user_articles__status='read',
+        ),
+        delta
+    )
+
+
+def stored_contribution(user_article):
+    """
+    (user_id, domain_id, points) the saved row currently contributes, or None if it is not
+    read. The row is locked until the save commits (UserArticle.save is atomic), so a
+    concurrent status change waits and then sees this one, and can't credit it twice.
+    """
+    return UserArticle.objects.select_for_update(of=('self',)).filter(pk=user_article.pk).values_list(
+        'user_id', 'article__scientific_domain_id', 'article__points', 'status'
+    ).first()
+
+
+def contribution(user_article):
+    if user_article.status != 'read':
+        return None
+    article = user_article.article
+    return user_article.user_id, article.scientific_domain_id, article.points
+
+
+def snapshot_user_article(user_article, update_fields=None):
+    if user_article._state.adding:
+        return None
+    if update_fields is not None and not USER_ARTICLE_POINT_FIELDS.intersection(update_fields):
+        return UNCHANGED
+    stored = stored_contribution(user_article)
+    return stored[:3] if stored and stored[3] == 'read' else None
+
+
+def record_user_article(user_article, before):
+    if before is UNCHANGED:
+        return
+    after = contribution(user_article)
+    if before == after:
+        return
+    if before:
+        credit_user(before[0], before[1], -before[2])
+    if after:
+        credit_user(*after)
+
+
+def discard_user_article(user_article):
+    removed = contribution(user_article)
+    if removed:
+        credit_user(removed[0], removed[1], -removed[2])
+
+
+def snapshot_article(article, update_fields=None):
+    if article._state.adding:
+        return None
+    if update_fields is not None and not ARTICLE_POINT_FIELDS.intersection(update_fields):
+        return UNCHANGED
+    return type(article).objects.filter(pk=article.pk).values_list('scientific_domain_id', 'points').first()
+
+
+def record_article(article, before):
+    if before is UNCHANGED or before is None:
+        return
+    old_domain_id, old_points = before
+    if old_domain_id == article.scientific_domain_id:
+        credit_readers(article.pk, old_domain_id, article.points - old_points)
+    else:
+        credit_readers(article.pk, old_domain_id, -old_points)
+        credit_readers(article.pk, article.scientific_domain_id, article.points)
+
+
+def recalculate(progress_queryset):
+    """Reset the ledger for the given progress rows from the UserArticle history."""
+    invalidate(*progress_queryset.values_list('user_profile__user_id', flat=True).distinct())
+    return progress_queryset.update(current_points=earned_points(), changed_at=Now())
+
+
+def reconcile(progress_queryset=None, chunk_size=1000, fix=True):
+    """
+    Walk the progress table in primary-key chunks, comparing each stored total to the
+    recomputed one. Yields (checked, drifted) per chunk; drifted rows are repaired when fix is set.
+    """
+    if progress_queryset is None:
+        progress_queryset = UserFieldProgress.all_objects.all()
+    last_pk = 0
+    while True:
+        chunk = list(
+            progress_queryset.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:chunk_size]
+        )
+        if not chunk:
+            return
+        last_pk = chunk[-1]
+        drifted = list(
+            UserFieldProgress.all_objects.filter(pk__in=chunk)
+            .annotate(expected=earned_points())
+            .exclude(current_points=F('expected'))
+            .select_related('user_profile')
+            .only('current_points', 'user_profile__user')
+        )
+        if drifted and fix:
+            # Recomputed in the UPDATE itself, not written back from the values read above:
+            # ledger deltas committed in between would be overwritten
+            with transaction.atomic():
+                UserFieldProgress.all_objects.filter(pk__in=[progress.pk for progress in drifted]).update(
+                    current_points=earned_points(), changed_at=Now()
+                )
+                invalidate(*{progress.user_profile.user_id for progress in drifted})
+        yield len(chunk), drifted
@@ -0,0 +1,148 @@
+# api/progress.py
+"""
+Write-coalescing buffer for reading positions.
+
+The reader reports its page on every page turn. record() only stores the latest page
+and the time it was received in the cache, under a key of the user and the UserArticle,
+and marks it pending in this process; a daemon thread writes the pending rows every
+PROGRESS_FLUSH_INTERVAL seconds with one UPDATE per batch, and once more at exit. Keying
+by the user means a beacon for somebody else's row can never replace the owner's buffered
+page, and the flush still checks ownership before writing.
+
+Flushes read the values back from the cache, so with a shared cache (REDIS_URL) a
+worker never writes a page older than one another worker has already buffered: the
+last beacon received wins. A synchronous save of page_left_off drops the buffered
+value (see api.signals). A flush may already have read that value, so each row is only
+written if it hasn't changed since its beacon was received (updated_at), and its
+updated_at becomes that time. A page saved after the beacon is therefore never
+overwritten by it.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, DateTimeField, IntegerField, Value, When
+from django.utils import timezone
+
+from .models import UserArticle
+
+FLUSH_INTERVAL = getattr(settings, 'PROGRESS_FLUSH_INTERVAL', 2)
+# Long enough to survive until the next flush of any worker
+BUFFER_TIMEOUT = getattr(settings, 'PROGRESS_BUFFER_TIMEOUT', 3600)
+BATCH_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+_pending = set()
+_lock = threading.Lock()
+_flusher = None
+
+
+def buffer_key(user_id, user_article_id):
+    return f'progress:{user_id}:{user_article_id}'
+
+
+def is_buffered(user_id, user_article_id):
+    """Whether a page of the user's is buffered for the row; only their own rows are recorded."""
+    return cache.get(buffer_key(user_id, user_article_id)) is not None
+
+
+def record(user_id, user_article_id, page):
+    """Buffer the page. The caller checks that the row exists and belongs to the user."""
+    cache.set(buffer_key(user_id, user_article_id), (page, timezone.now()), BUFFER_TIMEOUT)
+    with _lock:
+        _pending.add((user_id, user_article_id))
+    start_flusher()
+
+
+def forget(user_id, user_article_id):
+    with _lock:
+        _pending.discard((user_id, user_article_id))
+    cache.delete(buffer_key(user_id, user_article_id))
+
+
+def forget_many(user_id, user_article_ids):
+    if not user_article_ids:
+        return
+    with _lock:
+        _pending.difference_update((user_id, user_article_id) for user_article_id in user_article_ids)
+    cache.delete_many([buffer_key(user_id, user_article_id) for user_article_id in user_article_ids])
+
+
+def buffered_pages(user_articles):
+    """Show the latest buffered page of each UserArticle instead of the last flushed one."""
+    keys = {buffer_key(user_article.user_id, user_article.pk): user_article for user_article in user_articles}
+    for key, (page, _) in cache.get_many(keys).items():
+        keys[key].page_left_off = page
+    return user_articles
+
+
+def flush():
+    """Write every pending position. Returns the number of rows updated."""
+    with _lock:
+        entries = list(_pending)
+        _pending.clear()
+    written = 0
+    for start in range(0, len(entries), BATCH_SIZE):
+        try:
+            written += write_batch(entries[start:start + BATCH_SIZE])
+        except Exception:
+            # Keep the unwritten positions for the next flush
+            with _lock:
+                _pending.update(entries[start:])
+            raise
+    return written
+
+
+def write_batch(entries):
+    """
+    Write the buffered pages of [(user_id, user_article_id)] in one UPDATE, skipping rows
+    the user doesn't own and rows changed since the beacon was received.
+    """
+    keys = {buffer_key(user_id, user_article_id): (user_id, user_article_id) for user_id, user_article_id in entries}
+    buffered = {keys[key]: value for key, value in cache.get_many(keys).items()}
+    if not buffered:
+        return 0
+    # NULL for rows of another user, so the updated_at condition fails
+    received = Case(
+        *[When(pk=pk, user_id=user_id, then=Value(at)) for (user_id, pk), (_, at) in buffered.items()],
+        output_field=DateTimeField(),
+    )
+    return UserArticle.objects.filter(pk__in=[pk for _, pk in buffered], updated_at__lte=received).update(
+        page_left_off=Case(
+            *[When(pk=pk, then=Value(page)) for (_, pk), (page, _) in buffered.items()],
+            output_field=IntegerField(),
+        ),
+        updated_at=received,
+    )
+
+
+def run_flusher():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except Exception:
+            logger.exception("Flushing reading positions failed")
+        finally:
+            # This thread's own connection; don't hold it open between flushes
+            connection.close()
+
+
+def start_flusher():
+    global _flusher
+    if _flusher is not None and _flusher.is_alive():
+        return
+    with _lock:
+        if _flusher is None or not _flusher.is_alive():
+            _flusher = threading.Thread(target=run_flusher, name='progress-flusher', daemon=True)
+            _flusher.start()
+
+
+# Daemon threads are killed at exit, so flush what they haven't written yet
+atexit.register(flush)
@@ -0,0 +1,80 @@
+# api/ratings.py
+"""
+Per-article review statistics. Each article stores its review count, score sum and a
+Bayesian average that pulls articles with few reviews towards REVIEW_PRIOR_MEAN:
+
+    rating = (REVIEW_PRIOR_WEIGHT * REVIEW_PRIOR_MEAN + score_sum) / (REVIEW_PRIOR_WEIGHT + count)
+"""
+
+from django.conf import settings
+from django.db.models import Count, F, FloatField, OuterRef, PositiveIntegerField, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce
+
+from .conditional import bump
+from .models import Article, Review
+
+REVIEW_PRIOR_MEAN = getattr(settings, 'REVIEW_PRIOR_MEAN', 5.0)
+REVIEW_PRIOR_WEIGHT = getattr(settings, 'REVIEW_PRIOR_WEIGHT', 5)
+
+
+def bayesian_rating(score_sum, count):
+    return (
+        Value(REVIEW_PRIOR_WEIGHT * REVIEW_PRIOR_MEAN) + Cast(score_sum, FloatField())
+    ) / (Value(float(REVIEW_PRIOR_WEIGHT)) + Cast(count, FloatField()))
+
+
+def summary(article):
+    """The review statistics of an article as the API exposes them, read from its stored columns."""
+    return {
+        'count': article.review_count,
+        'average': round(article.review_score_sum / article.review_count, 2) if article.review_count else None,
+        'rating': article.review_rating,
+    }
+
+
+def record_review(article_id, count_delta, score_delta):
+    if not count_delta and not score_delta:
+        return
+    # All F() references read the pre-update values, so the rating is computed from the new totals
+    Article.objects.filter(pk=article_id).update(
+        review_count=F('review_count') + count_delta,
+        review_score_sum=F('review_score_sum') + score_delta,
+        review_rating=bayesian_rating(
+            F('review_score_sum') + score_delta, F('review_count') + count_delta
+        ),
+    )
+    bump('article')
+
+
+def snapshot_review(review):
+    if review._state.adding:
+        return None
+    return Review.objects.filter(pk=review.pk).values_list('article_id', 'score').first()
+
+
+def record_review_save(review, before):
+    if before is not None:
+        if before == (review.article_id, review.score):
+            return
+        record_review(before[0], -1, -before[1])
+    record_review(review.article_id, 1, review.score)
+
+
+def record_review_delete(review):
+    record_review(review.article_id, -1, -review.score)
+
+
+def recalculate(article_queryset=None):
+    """Recompute the statistics of the given articles from their reviews."""
+    if article_queryset is None:
+        article_queryset = Article.objects.all()
+    reviews = Review.objects.filter(article=OuterRef('pk')).order_by().values('article')
+    count = Coalesce(Subquery(reviews.annotate(n=Count('pk')).values('n')), Value(0),
+                     output_field=PositiveIntegerField())
+    score_sum = Coalesce(Subquery(reviews.annotate(total=Sum('score')).values('total')), Value(0),
+                         output_field=PositiveIntegerField())
+    updated = article_queryset.update(
+        review_count=count, review_score_sum=score_sum, review_rating=bayesian_rating(score_sum, count)
+    )
+    bump('article')
+    return updated
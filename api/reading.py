@@ -0,0 +1,112 @@
+# api/reading.py
+
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import points, progress, routing
+from .models import Article, UserArticle
+
+BATCH_SIZE = 500
+
+
+def start_reading(user, article_id, status='reading', page_left_off=0):
+    """
+    Return the user's UserArticle for the article, creating it if needed, as (row, created).
+    It is one race-free INSERT ... ON CONFLICT (user_id, article_id) statement, and an
+    existing row is returned unchanged. On PostgreSQL the statement always returns the row,
+    and xmax = 0 tells whether it was inserted. Elsewhere (SQLite) a conflict returns
+    nothing and the existing row is selected.
+
+    The row is inserted from a SELECT on the article, so an unknown article inserts nothing
+    and raises Article.DoesNotExist. The foreign keys are deferred and would only fail at
+    the final commit, past any handler in the view.
+    """
+    table = connection.ops.quote_name(UserArticle._meta.db_table)
+    articles = connection.ops.quote_name(Article._meta.db_table)
+    now = connection.ops.adapt_datetimefield_value(timezone.now())
+    params = [user.pk, status, page_left_off, now, article_id]
+    insert = (
+        f"INSERT INTO {table} (user_id, article_id, status, page_left_off, updated_at) "
+        f"SELECT %s, id, %s, %s, %s FROM {articles} WHERE id = %s "
+        f"ON CONFLICT (user_id, article_id)"
+    )
+    routing.note_write()
+    with transaction.atomic(), connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            # The no-op update locks and returns the existing row
+            cursor.execute(
+                f"{insert} DO UPDATE SET user_id = EXCLUDED.user_id "
+                f"RETURNING id, status, page_left_off, (xmax = 0)",
+                params,
+            )
+            row = cursor.fetchone()
+            if row is None:
+                raise Article.DoesNotExist(article_id)
+            pk, status, page_left_off, created = row
+        else:
+            cursor.execute(f"{insert} DO NOTHING RETURNING id, status, page_left_off", params)
+            row = cursor.fetchone()
+            created = row is not None
+            if not created:
+                cursor.execute(
+                    f"SELECT id, status, page_left_off FROM {table} WHERE user_id = %s AND article_id = %s",
+                    [user.pk, article_id],
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    raise Article.DoesNotExist(article_id)
+            pk, status, page_left_off = row
+
+        user_article = UserArticle(
+            pk=pk, user_id=user.pk, article_id=article_id, status=status, page_left_off=page_left_off
+        )
+        user_article._state.adding = False
+        user_article._state.db = connection.alias
+        if created and status == 'read':
+            # The insert bypassed the post_save ledger signal
+            points.record_user_article(user_article, None)
+    return user_article, created
+
+
+def apply_changes(user, changes):
+    """
+    Apply {user_article_id: {'status': ..., 'page_left_off': ...}} to the user's rows in one
+    transaction. That takes one SELECT ... FOR UPDATE, one UPDATE per BATCH_SIZE rows, and
+    one points UPDATE per domain whose read articles changed. Returns the updated rows; raises
+    UserArticle.DoesNotExist if an id isn't one of the user's.
+    """
+    with transaction.atomic():
+        rows = {
+            user_article.pk: user_article
+            for user_article in UserArticle.objects.select_for_update(of=('self',))
+            .filter(user=user, pk__in=changes)
+            .select_related('article')
+            .only('id', 'user_id', 'article_id', 'status', 'page_left_off',
+                  'article__scientific_domain_id', 'article__points')
+        }
+        missing = changes.keys() - rows.keys()
+        if missing:
+            raise UserArticle.DoesNotExist(sorted(missing))
+
+        now = timezone.now()
+        deltas = defaultdict(int)
+        for pk, change in changes.items():
+            user_article = rows[pk]
+            was_read = user_article.status == 'read'
+            user_article.status = change.get('status', user_article.status)
+            user_article.page_left_off = change.get('page_left_off', user_article.page_left_off)
+            user_article.updated_at = now
+            if was_read != (user_article.status == 'read'):
+                article = user_article.article
+                deltas[article.scientific_domain_id] += article.points if not was_read else -article.points
+
+        UserArticle.objects.bulk_update(
+            rows.values(), ['status', 'page_left_off', 'updated_at'], batch_size=BATCH_SIZE
+        )
+        # bulk_update sends no signals: keep the ledger and the progress buffer in step
+        for domain_id, delta in deltas.items():
+            points.credit_user(user.pk, domain_id, delta)
+        progress.forget_many(user.pk, [pk for pk, change in changes.items() if 'page_left_off' in change])
+    return [rows[pk] for pk in changes]
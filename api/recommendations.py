@@ -0,0 +1,156 @@
+# api/recommendations.py
+"""
+Item-item collaborative filtering.
+
+Every UserArticle and Review becomes a weight in a sparse user x article matrix. The
+columns are L2-normalised, so X.T @ X holds the cosine similarity of every article pair.
+It is computed one block of articles at a time so memory stays bounded, and only the top
+``neighbours`` entries of each row are stored in ArticleSimilarity. The recommendation
+endpoint then answers from that table alone.
+
+Requires numpy and scipy, which only the build_recommendations command imports.
+"""
+
+import numpy as np
+from scipy import sparse
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import ArticleSimilarity, Review, UserArticle
+
+STATUS_WEIGHTS = {'reading': 1.0, 'read': 2.0, 'reviewed': 2.0}
+# A review moves the weight by up to +/- REVIEW_WEIGHT around a neutral score of 5/10
+REVIEW_WEIGHT = 1.0
+
+
+class InteractionMatrix:
+    def __init__(self, matrix, user_ids, article_ids):
+        self.matrix = matrix
+        self.user_ids = user_ids
+        self.article_ids = article_ids
+        self.article_index = {article_id: i for i, article_id in enumerate(article_ids)}
+
+    @classmethod
+    def build(cls, chunk_size=10000):
+        users, articles, weights = [], [], []
+        for user_id, article_id, status in UserArticle.objects.values_list(
+            'user_id', 'article_id', 'status'
+        ).iterator(chunk_size=chunk_size):
+            users.append(user_id)
+            articles.append(article_id)
+            weights.append(STATUS_WEIGHTS.get(status, 1.0))
+        for user_id, article_id, score in Review.objects.values_list(
+            'user_id', 'article_id', 'score'
+        ).iterator(chunk_size=chunk_size):
+            users.append(user_id)
+            articles.append(article_id)
+            weights.append(REVIEW_WEIGHT * (score - 5) / 5)
+
+        user_ids, user_rows = np.unique(np.asarray(users, dtype=np.int64), return_inverse=True)
+        article_ids, article_cols = np.unique(np.asarray(articles, dtype=np.int64), return_inverse=True)
+        # Duplicate (user, article) entries - a status and a review - are summed by the COO -> CSC conversion
+        matrix = sparse.coo_matrix(
+            (np.asarray(weights, dtype=np.float32), (user_rows, article_cols)),
+            shape=(len(user_ids), len(article_ids)),
+        ).tocsc()
+        matrix.eliminate_zeros()
+        return cls(matrix, user_ids, article_ids)
+
+    def normalised(self):
+        norms = np.sqrt(np.asarray(self.matrix.multiply(self.matrix).sum(axis=0)).ravel())
+        norms[norms == 0] = 1
+        return (self.matrix @ sparse.diags(1 / norms)).tocsc()
+
+    def columns_for(self, article_ids):
+        return np.array(
+            sorted(self.article_index[a] for a in article_ids if a in self.article_index), dtype=np.int64
+        )
+
+    def co_interacted(self, columns):
+        """Columns of every article sharing at least one user with the given columns."""
+        users = np.unique(self.matrix[:, columns].tocoo().row)
+        return np.unique(self.matrix.tocsr()[users].tocoo().col)
+
+
+def top_neighbours(normalised, columns, neighbours, block_size):
+    """Yield (column, neighbour columns, scores) for each requested column, best first."""
+    transposed = normalised.T.tocsr()
+    for start in range(0, len(columns), block_size):
+        block = columns[start:start + block_size]
+        similarities = (transposed[block] @ normalised).tocsr()
+        for row, column in enumerate(block):
+            begin, end = similarities.indptr[row], similarities.indptr[row + 1]
+            cols = similarities.indices[begin:end]
+            scores = similarities.data[begin:end]
+            keep = (cols != column) & (scores > 0)
+            cols, scores = cols[keep], scores[keep]
+            if len(cols) > neighbours:
+                best = np.argpartition(-scores, neighbours)[:neighbours]
+                cols, scores = cols[best], scores[best]
+            order = np.argsort(-scores, kind='stable')
+            yield column, cols[order], scores[order]
+
+
+def store(interactions, rows, computed_at, batch_size=5000):
+    """
+    Replace the stored neighbours of the rebuilt articles in one transaction. computed_at
+    is taken before the interactions were read, so nothing written meanwhile is skipped
+    by the next incremental refresh.
+    """
+    article_ids = interactions.article_ids
+    objects, rebuilt = [], []
+    with transaction.atomic():
+        for column, cols, scores in rows:
+            rebuilt.append(int(article_ids[column]))
+            objects.extend(
+                ArticleSimilarity(
+                    article_id=int(article_ids[column]), neighbour_id=int(article_ids[c]),
+                    score=float(s), computed_at=computed_at,
+                )
+                for c, s in zip(cols, scores)
+            )
+            if len(rebuilt) >= batch_size:
+                ArticleSimilarity.objects.filter(article_id__in=rebuilt).delete()
+                ArticleSimilarity.objects.bulk_create(objects, batch_size=batch_size)
+                objects, rebuilt = [], []
+        if rebuilt:
+            ArticleSimilarity.objects.filter(article_id__in=rebuilt).delete()
+            ArticleSimilarity.objects.bulk_create(objects, batch_size=batch_size)
+
+
+def rebuild(neighbours=20, block_size=512):
+    """Recompute every article's neighbours. Returns the number of articles processed."""
+    started = timezone.now()
+    interactions = InteractionMatrix.build()
+    columns = np.arange(len(interactions.article_ids))
+    with transaction.atomic():
+        ArticleSimilarity.objects.all().delete()
+        if len(columns):
+            rows = top_neighbours(interactions.normalised(), columns, neighbours, block_size)
+            store(interactions, rows, started)
+    return len(columns)
+
+
+def refresh(since=None, neighbours=20, block_size=512):
+    """
+    Recompute only the articles whose similarities can have changed since the last build:
+    the articles with new or updated interactions, and every article sharing a reader
+    with one of them (their cosine norms changed). Deleted interactions are only picked
+    up by a full rebuild.
+    """
+    if since is None:
+        since = ArticleSimilarity.objects.aggregate(last=Max('computed_at'))['last']
+        if since is None:
+            return rebuild(neighbours, block_size)
+
+    started = timezone.now()
+    changed = set(UserArticle.objects.filter(updated_at__gt=since).values_list('article_id', flat=True))
+    changed.update(Review.objects.filter(updated_at__gt=since).values_list('article_id', flat=True))
+    if not changed:
+        return 0
+
+    interactions = InteractionMatrix.build()
+    columns = interactions.co_interacted(interactions.columns_for(changed))
+    store(interactions, top_neighbours(interactions.normalised(), columns, neighbours, block_size), started)
+    return len(columns)
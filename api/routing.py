@@ -0,0 +1,143 @@
+# api/routing.py
+"""
+Read replicas for the read-mostly API views.
+
+DATABASE_REPLICAS maps replica aliases of DATABASES to weights. Views with
+ReplicaReadMixin (and the async views with ``replica_reads``) pick one replica per
+safe-method request, by weight, and ReplicaRouter sends that request's reads there.
+Everything else, including all reads outside those requests, uses 'default'. So does a
+replica that points at the 'default' database itself, as the test runner sets up replicas
+declared as TEST MIRROR of 'default'.
+
+Read-your-writes: a request that writes to the database pins its user to 'default' for
+READ_YOUR_WRITES_WINDOW seconds. The pin is kept in the 'default' cache, which must be
+shared by every worker (REDIS_URL) for the guarantee to hold: with the local-memory
+fallback each process has its own pins, and a write is only followed by 'default' reads
+in the worker that handled it. With a shared cache, a reader who has just marked an
+article read sees the articles it unlocked, even while the replicas lag behind. Keep the
+window above the replication lag.
+"""
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICAS = getattr(settings, 'DATABASE_REPLICAS', {})
+READ_YOUR_WRITES_WINDOW = getattr(settings, 'READ_YOUR_WRITES_WINDOW', 5)
+
+_routing = ContextVar('replica_routing', default=None)
+
+
+class RequestRouting:
+    """The read alias of one request, and whether it has written."""
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.wrote = False
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        return routing.alias if routing is not None else None
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as 'default'
+        databases = {DEFAULT_DB_ALIAS, *REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get their schema through replication
+        return False if db in REPLICAS else None
+
+
+def pin_key(user_id):
+    return f'pinned:{user_id}'
+
+
+def same_database(alias):
+    # The test runner points a replica (TEST MIRROR) at the test database of 'default', and
+    # TestCase only allows queries to the databases it isolates
+    replica, primary = connections[alias].settings_dict, connections[DEFAULT_DB_ALIAS].settings_dict
+    return all(replica[key] == primary[key] for key in ('ENGINE', 'NAME', 'HOST', 'PORT'))
+
+
+def choose_replica():
+    """A replica by weight, or 'default' if every replica is the 'default' database itself."""
+    replicas = {alias: weight for alias, weight in REPLICAS.items() if not same_database(alias)}
+    if not replicas:
+        return DEFAULT_DB_ALIAS
+    return random.choices(list(replicas), weights=list(replicas.values()))[0]
+
+
+def uses_replica(request):
+    return bool(REPLICAS) and request.method in SAFE_METHODS
+
+
+def start(request, user):
+    """Choose where this request reads; returns the token for finish()."""
+    alias = DEFAULT_DB_ALIAS
+    if uses_replica(request) and not (user.is_authenticated and cache.get(pin_key(user.pk))):
+        alias = choose_replica()
+    return _routing.set(RequestRouting(alias))
+
+
+async def astart(request, user):
+    alias = DEFAULT_DB_ALIAS
+    if uses_replica(request) and not (user.is_authenticated and await cache.aget(pin_key(user.pk))):
+        alias = choose_replica()
+    return _routing.set(RequestRouting(alias))
+
+
+def note_write():
+    """For writes that bypass the router, such as raw SQL."""
+    routing = _routing.get()
+    if routing is not None:
+        routing.wrote = True
+
+
+def finish(token, user):
+    """Pin a user who wrote during the request to 'default'."""
+    routing = _routing.get()
+    _routing.reset(token)
+    if routing.wrote and REPLICAS and user.is_authenticated:
+        cache.set(pin_key(user.pk), True, READ_YOUR_WRITES_WINDOW)
+
+
+async def afinish(token, user):
+    routing = _routing.get()
+    _routing.reset(token)
+    if routing.wrote and REPLICAS and user.is_authenticated:
+        await cache.aset(pin_key(user.pk), True, READ_YOUR_WRITES_WINDOW)
+
+
+class ReplicaReadMixin:
+    """
+    For APIViews: safe-method requests read from a replica unless the user is pinned, and
+    any request that writes pins its user. The choice is made after authentication, so the
+    user lookup itself reads 'default'.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.routing_token = start(request, request.user)
+
+    def dispatch(self, request, *args, **kwargs):
+        self.routing_token = None
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self.routing_token is not None:
+                finish(self.routing_token, self.request.user)
@@ -0,0 +1,106 @@
+# api/search.py
+"""
+Full-text search over article titles and content.
+
+PostgreSQL keeps a generated tsvector column (api_article.search_vector) behind a GIN index;
+SQLite, used for local and test runs, keeps an FTS5 index (api_article_fts) in sync with
+triggers. Both are created by migration 0011; because SQLite migrations rebuild tables
+(dropping their triggers) when columns are added, ensure_sqlite_index() also restores the
+triggers after every migrate. Other databases get no index: every term must appear in
+the title or content (icontains), which scans the table. Matches are annotated with a
+``rank`` (higher is better) rounded so it can serve as a pagination cursor; on the
+fallback it is the number of terms found in the title.
+"""
+
+from functools import reduce
+from operator import add
+
+from django.db import connections
+from django.db.models import BooleanField, Case, DecimalField, FloatField, Q, Value, When
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+
+SQLITE_TRIGGERS = {
+    'api_article_fts_insert': """
+        CREATE TRIGGER IF NOT EXISTS api_article_fts_insert AFTER INSERT ON api_article BEGIN
+            INSERT INTO api_article_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+    'api_article_fts_delete': """
+        CREATE TRIGGER IF NOT EXISTS api_article_fts_delete AFTER DELETE ON api_article BEGIN
+            INSERT INTO api_article_fts(api_article_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+        END
+    """,
+    'api_article_fts_update': """
+        CREATE TRIGGER IF NOT EXISTS api_article_fts_update AFTER UPDATE OF title, content ON api_article BEGIN
+            INSERT INTO api_article_fts(api_article_fts, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO api_article_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+}
+
+
+def fts5_query(query):
+    # Quote every term so user input can't be parsed as FTS5 operators
+    return ' '.join('"%s"' % term.replace('"', '""') for term in query.split())
+
+
+def search(queryset, query):
+    table = queryset.model._meta.db_table
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        matches = RawSQL(f'"{table}"."search_vector" @@ {tsquery}', [query], output_field=BooleanField())
+        rank = RawSQL(
+            f'round(ts_rank_cd("{table}"."search_vector", {tsquery})::numeric, 6)',
+            [query], output_field=DecimalField(max_digits=12, decimal_places=6)
+        )
+    elif vendor == 'sqlite':
+        query = fts5_query(query)
+        matches = RawSQL(
+            f'"{table}"."id" IN (SELECT rowid FROM {table}_fts WHERE {table}_fts MATCH %s)',
+            [query], output_field=BooleanField()
+        )
+        # bm25() is lower-is-better; title matches weigh ten times content matches
+        rank = RawSQL(
+            f'(SELECT round(-bm25({table}_fts, 10.0, 1.0), 6) FROM {table}_fts '
+            f'WHERE {table}_fts MATCH %s AND rowid = "{table}"."id")',
+            [query], output_field=FloatField()
+        )
+    else:
+        return substring_search(queryset, query.split())
+
+    return queryset.filter(matches).annotate(rank=rank)
+
+
+def substring_search(queryset, terms):
+    """Unindexed fallback: articles containing every term, ranked by the terms in their title."""
+    matches = Q()
+    for term in terms:
+        matches &= Q(title__icontains=term) | Q(content__icontains=term)
+    rank = reduce(add, [
+        Case(When(title__icontains=term, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+        for term in terms
+    ])
+    return queryset.filter(matches).annotate(rank=rank)
+
+
+def ensure_sqlite_index(connection):
+    """Recreate missing FTS5 sync triggers and rebuild the index they failed to maintain."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'api_article_fts'")
+        if cursor.fetchone() is None:
+            return
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'api_article_fts_%'")
+        missing = SQLITE_TRIGGERS.keys() - {name for (name,) in cursor.fetchall()}
+        if not missing:
+            return
+        for name in missing:
+            cursor.execute(SQLITE_TRIGGERS[name])
+        cursor.execute("INSERT INTO api_article_fts(api_article_fts) VALUES ('rebuild')")
@@ -0,0 +1,162 @@
+# api/seed.py
+"""
+Synthetic datasets for the query-budget tests and the benchmarks, written with bulk_create
+and brought into a consistent state with the same recalculations the ledger and rating
+maintenance commands use.
+
+Volumes follow the skew of real usage: domain sizes and article popularity are Zipf
+distributed, reading activity per user is Pareto distributed (a few heavy readers), most
+reads fall in the reader's own interests, and article quality shifts review scores.
+Users are written in chunks, so memory stays bounded by the article count.
+"""
+
+import bisect
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+
+from . import points, ratings
+from .conditional import bump
+from .models import (
+    Article, ArticleSimilarity, Review, ScientificDomain, UserArticle, UserFieldProgress, UserProfile,
+)
+
+SEED_PASSWORD = 'seed-password'
+TOPICS = ('cells', 'graphs', 'stars', 'proofs', 'proteins', 'networks', 'climate', 'markets')
+WORDS = ('lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit')
+
+
+class Dataset:
+    def __init__(self, domains, articles, users):
+        self.domains = domains
+        self.articles = articles
+        self.users = users
+
+
+class ZipfSampler:
+    """Draws items with probability proportional to 1 / rank ** exponent."""
+
+    def __init__(self, items, exponent, rng):
+        self.items = items
+        self.rng = rng
+        self.cumulative = list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, len(items) + 1)))
+
+    def draw(self):
+        index = bisect.bisect(self.cumulative, self.rng.random() * self.cumulative[-1])
+        return self.items[min(index, len(self.items) - 1)]
+
+    def distinct(self, count):
+        """Up to ``count`` distinct items; popular items come up more often."""
+        count = min(count, len(self.items))
+        chosen = {}
+        for _ in range(count * 4):
+            item = self.draw()
+            chosen[id(item)] = item
+            if len(chosen) >= count:
+                break
+        return list(chosen.values())
+
+
+def seed(users=50, articles=500, domains=8, reads_per_user=20, interests_per_user=3, review_ratio=0.4,
+         skew=1.0, prefix='seed', batch_size=2000, rng=None, progress=None):
+    """
+    Create ``users`` users with interests and reading history, ``articles`` articles spread
+    over ``domains`` domains, reviews of read articles and item similarities.
+    ``reads_per_user`` is the mean history length and ``skew`` the Zipf exponent of
+    popularity. Every user's password is SEED_PASSWORD. ``progress`` is called with a
+    message after each step.
+    """
+    rng = rng or random.Random(0)
+    report = progress or (lambda message: None)
+
+    domain_rows = ScientificDomain.objects.bulk_create(
+        [ScientificDomain(name=f'{prefix}-domain-{i}') for i in range(domains)]
+    )
+    domain_sampler = ZipfSampler(domain_rows, skew, rng)
+    article_rows = []
+    for start in range(0, articles, batch_size):
+        article_rows += Article.objects.bulk_create([
+            Article(
+                scientific_domain=domain_sampler.draw(),
+                title=f'{prefix} article {i} on {rng.choice(TOPICS)}',
+                content=' '.join(rng.choice(WORDS) for _ in range(rng.randint(100, 400))),
+                number_of_pages=rng.randint(5, 60),
+                points=rng.randint(1, 20),
+                minimum_points=None if rng.random() < 0.6 else rng.randint(0, 40),
+            )
+            for i in range(start, min(start + batch_size, articles))
+        ])
+    report(f"{len(domain_rows)} domains, {len(article_rows)} articles")
+
+    # Popularity within each domain, and overall for reads outside the reader's interests
+    rng.shuffle(article_rows)
+    by_domain = {domain.pk: [] for domain in domain_rows}
+    for article in article_rows:
+        by_domain[article.scientific_domain_id].append(article)
+    domain_articles = {pk: ZipfSampler(rows, skew, rng) for pk, rows in by_domain.items() if rows}
+    all_articles = ZipfSampler(article_rows, skew, rng)
+    quality = {article.pk: rng.gauss(6, 1.5) for article in article_rows}
+
+    password = make_password(SEED_PASSWORD)
+    user_rows = []
+    counts = {'progress': 0, 'user_articles': 0, 'reviews': 0}
+    for start in range(0, users, batch_size):
+        chunk = User.objects.bulk_create([
+            User(username=f'{prefix}-user-{i}', email=f'{prefix}{i}@example.com', password=password)
+            for i in range(start, min(start + batch_size, users))
+        ])
+        profiles = UserProfile.objects.bulk_create([UserProfile(user=user) for user in chunk])
+        progress_rows, user_articles, reviews = [], [], []
+        for user, profile in zip(chunk, profiles):
+            interests = domain_sampler.distinct(rng.randint(1, max(1, interests_per_user * 2 - 1)))
+            progress_rows += [UserFieldProgress(user_profile=profile, scientific_domain=d) for d in interests]
+
+            history = min(articles, max(1, int(rng.paretovariate(2.0) * reads_per_user / 2)))
+            read = {}
+            for _ in range(history):
+                domain = rng.choice(interests)
+                sampler = domain_articles.get(domain.pk) if rng.random() < 0.8 else None
+                article = (sampler or all_articles).draw()
+                read[article.pk] = article
+            for article in read.values():
+                status = rng.choices(('reading', 'read', 'reviewed'), weights=(3, 6, 1))[0]
+                user_articles.append(UserArticle(
+                    user=user, article=article, status=status,
+                    page_left_off=article.number_of_pages if status != 'reading' else
+                    rng.randint(0, article.number_of_pages),
+                ))
+                if status != 'reading' and rng.random() < review_ratio:
+                    score = round(min(10, max(1, rng.gauss(quality[article.pk], 1.5))))
+                    reviews.append(Review(user=user, article=article, score=score))
+        UserFieldProgress.all_objects.bulk_create(progress_rows, batch_size=batch_size)
+        UserArticle.objects.bulk_create(user_articles, batch_size=batch_size)
+        Review.objects.bulk_create(reviews, batch_size=batch_size)
+        user_rows += chunk
+        counts['progress'] += len(progress_rows)
+        counts['user_articles'] += len(user_articles)
+        counts['reviews'] += len(reviews)
+        report(
+            f"{len(user_rows)} users, {counts['progress']} interests, "
+            f"{counts['user_articles']} user articles, {counts['reviews']} reviews"
+        )
+
+    similarities = []
+    for article in article_rows:
+        sampler = domain_articles[article.scientific_domain_id]
+        similarities += [
+            ArticleSimilarity(article=article, neighbour=neighbour, score=rng.random())
+            for neighbour in sampler.distinct(5) if neighbour is not article
+        ]
+        if len(similarities) >= batch_size:
+            ArticleSimilarity.objects.bulk_create(similarities, ignore_conflicts=True)
+            similarities = []
+    ArticleSimilarity.objects.bulk_create(similarities, ignore_conflicts=True)
+
+    # bulk_create skips the ledger and rating signals
+    points.recalculate(UserFieldProgress.all_objects.filter(user_profile__user__username__startswith=f'{prefix}-user-'))
+    ratings.recalculate(Article.objects.filter(title__startswith=f'{prefix} article '))
+    bump('article', 'scientificdomain')
+    report("points and ratings recalculated")
+    return Dataset(domain_rows, article_rows, user_rows)
@@ -1,30 +1,109 @@
 # api/serializers.py
 
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+from django.urls import reverse
 from django.contrib.auth.models import User
+from django.contrib.auth.validators import UnicodeUsernameValidator
 from .models import ScientificDomain, Article, UserProfile, UserArticle, UserFieldProgress, Review
 from django.db import transaction
+from .instrumentation import TimedRepresentationMixin
+from .interests import set_interests
+
+class SparseFieldsMixin:
+    """
+    Lets a GET request ask for a subset of fields with ?fields=a,b,c ('id' is always kept).
+    column_map translates serializer fields into the model columns passed to only().
+    """
+    column_map = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get('request'))
+        if requested:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        if request is None or request.method != 'GET' or not request.query_params.get('fields'):
+            return None
+        requested = {name.strip() for name in request.query_params['fields'].split(',')}
+        return (requested & set(cls.Meta.fields)) | {'id'}
+
+    @classmethod
+    def columns_for(cls, fields):
+        return [cls.column_map.get(name, name) for name in fields]
+
+
+class BulkManyRelatedField(serializers.ManyRelatedField):
+    """Resolves the whole list of slugs with one query instead of one per item."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        slugs = list(dict.fromkeys(data))
+        found = {
+            getattr(obj, child.slug_field): obj
+            for obj in child.get_queryset().filter(**{f'{child.slug_field}__in': slugs})
+        }
+        for slug in slugs:
+            if slug not in found:
+                child.fail('does_not_exist', slug_name=child.slug_field, value=slug)
+        return [found[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+
+def article_download_url(article):
+    # Files are only published through the permission-checked download action
+    return reverse('article-download', args=[article.pk]) if article.file else None
+
+
+class ArticleFileField(serializers.FileField):
+    """Accepts uploads like FileField, but represents the file by its download URL."""
+
+    def get_attribute(self, instance):
+        return instance
+
+    def to_representation(self, article):
+        url = article_download_url(article)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if url and request is not None else url
+
 
-class ScientificDomainSerializer(serializers.ModelSerializer):
+class ScientificDomainSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     class Meta:
         model = ScientificDomain
         fields = ['id', 'name']
 
-class UserFieldProgressSerializer(serializers.ModelSerializer):
+class UserFieldProgressSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     scientific_domain = ScientificDomainSerializer(read_only=True)
 
     class Meta:
         model = UserFieldProgress
         fields = ['scientific_domain', 'current_points', 'active']
 
-class UserSerializer(serializers.ModelSerializer):
-    interests = serializers.SlugRelatedField(
+class UserSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
+    interests = BulkSlugRelatedField(
         many=True,
         queryset=ScientificDomain.objects.all(),
         slug_field='name',
-        source='profile.preferred_fields'
+        source='profile.active_interests'
     )
-    field_progress = UserFieldProgressSerializer(many=True, read_only=True, source='profile.field_progress')
+    field_progress = UserFieldProgressSerializer(many=True, read_only=True, source='profile.progress_with_domains')
 
     class Meta:
         model = User
@@ -32,31 +111,23 @@ class UserSerializer(serializers.ModelSerializer):
 
     def update(self, instance, validated_data):
         profile_data = validated_data.pop('profile', {})
-        new_interests = profile_data.get('preferred_fields', [])
 
-        # Update the user's other fields first
+        # Update the user's other fields first. Only those are written, request.user may come
+        # from the authentication cache
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
-
-        # Set the new preferred fields
-        instance.profile.preferred_fields.set(new_interests)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
 
-        # Reactivate or create progress for newly added interests
-        for domain in new_interests:
-            progress, created = UserFieldProgress.objects.get_or_create(
-                user_profile=instance.profile,
-                scientific_domain=domain
-            )
-            progress.active = True
-            # If newly created, current_points = 0 by default
-            progress.save()
+        # Deactivate, reactivate or create progress rows to match the new interests
+        if 'active_interests' in profile_data:
+            set_interests(instance.profile, profile_data['active_interests'])
 
         return instance
 
 class RegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
-    interests = serializers.SlugRelatedField(
+    interests = BulkSlugRelatedField(
         many=True,
         queryset=ScientificDomain.objects.all(),
         slug_field='name',
@@ -79,32 +150,44 @@ class RegisterSerializer(serializers.ModelSerializer):
             last_name=validated_data.get('last_name', ''),
             email=validated_data.get('email', ''),
         )
-        user.profile.preferred_fields.set(interests)
+        set_interests(user.profile, interests)
         return user
 
-class ArticleSerializer(serializers.ModelSerializer):
+class ProvisionUserSerializer(serializers.ModelSerializer):
+    """One row of a bulk registration. Uniqueness and interests are checked per batch by api.provisioning."""
+    password = serializers.CharField(write_only=True)
+    interests = serializers.ListField(child=serializers.CharField(), required=False)
+
+    class Meta:
+        model = User
+        fields = ['username', 'password', 'first_name', 'last_name', 'email', 'interests']
+        extra_kwargs = {'username': {'validators': [UnicodeUsernameValidator()]}}
+
+class ArticleSerializer(TimedRepresentationMixin, SparseFieldsMixin, serializers.ModelSerializer):
     scientific_domain = serializers.SlugRelatedField(
         slug_field='name',
         queryset=ScientificDomain.objects.all()
     )
+    file = ArticleFileField(required=False, allow_null=True)
+    column_map = {'scientific_domain': 'scientific_domain__name'}
 
     class Meta:
         model = Article
         fields = [
             'id', 'scientific_domain', 'title', 'content',
-            'number_of_pages', 'points', 'minimum_points', 'file'
+            'number_of_pages', 'points', 'minimum_points', 'file',
+            'review_count', 'review_rating'
         ]
 
     def create(self, validated_data):
-        scientific_domain_name = validated_data.pop('scientific_domain')
-        scientific_domain = ScientificDomain.objects.get(name=scientific_domain_name)
+        # The SlugRelatedField has already resolved the domain name to an instance
+        scientific_domain = validated_data.pop('scientific_domain')
         article = Article.objects.create(scientific_domain=scientific_domain, **validated_data)
         return article
 
     def update(self, instance, validated_data):
-        scientific_domain_name = validated_data.pop('scientific_domain', None)
-        if scientific_domain_name:
-            scientific_domain = ScientificDomain.objects.get(name=scientific_domain_name)
+        scientific_domain = validated_data.pop('scientific_domain', None)
+        if scientific_domain:
             instance.scientific_domain = scientific_domain
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
@@ -112,7 +195,18 @@ class ArticleSerializer(serializers.ModelSerializer):
         return instance
 
 
-class UserArticleSerializer(serializers.ModelSerializer):
+class ArticleListSerializer(ArticleSerializer):
+    """Compact representation for list views: everything but the article body."""
+
+    class Meta(ArticleSerializer.Meta):
+        fields = [
+            'id', 'scientific_domain', 'title',
+            'number_of_pages', 'points', 'minimum_points', 'file',
+            'review_count', 'review_rating'
+        ]
+
+
+class UserArticleSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     article = serializers.PrimaryKeyRelatedField(queryset=Article.objects.all())
     status = serializers.CharField(required=False, default='reading')
 
@@ -129,7 +223,23 @@ class UserArticleSerializer(serializers.ModelSerializer):
     #     return user_article
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class StartReadingSerializer(serializers.Serializer):
+    article = serializers.IntegerField(min_value=1)
+    status = serializers.ChoiceField(choices=UserArticle.STATUS_CHOICES, default='reading')
+    page_left_off = serializers.IntegerField(min_value=0, default=0)
+
+
+class UserArticleChangeSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=UserArticle.STATUS_CHOICES, required=False)
+    page_left_off = serializers.IntegerField(min_value=0, required=False)
+
+
+class ProgressBeaconSerializer(TimedRepresentationMixin, serializers.Serializer):
+    page_left_off = serializers.IntegerField(min_value=0)
+
+
+class ReviewSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     article = serializers.PrimaryKeyRelatedField(queryset=Article.objects.all())
 
     class Meta:
@@ -161,7 +271,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 # api/serializers.py
 
-class StoreArticleSerializer(serializers.ModelSerializer):
+class StoreArticleSerializer(TimedRepresentationMixin, serializers.ModelSerializer):
     file_path = serializers.SerializerMethodField()
 
     class Meta:
@@ -169,6 +279,4 @@ class StoreArticleSerializer(serializers.ModelSerializer):
         fields = ['id', 'title', 'scientific_domain', 'points', 'minimum_points', 'file_path']
 
     def get_file_path(self, obj):
-        if obj.file:
-            return obj.file.url
-        return None
\ No newline at end of file
+        return article_download_url(obj)
\ No newline at end of file
@@ -1,9 +1,12 @@
 # api/signals.py
 
-from django.db.models.signals import post_save, m2m_changed
+from django.db import connections
+from django.db.models.signals import post_save, pre_save, post_delete, m2m_changed, post_migrate
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile, UserFieldProgress, ScientificDomain
+from .models import UserProfile, UserFieldProgress, ScientificDomain, Article, UserArticle, Review
+from . import conditional, eligibility, points, progress, ratings, search
+from .authentication import forget_user
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -12,4 +15,122 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=User)
 def save_user_profile(sender, instance, **kwargs):
-    instance.profile.save()
\ No newline at end of file
+    # Only a profile loaded and modified through this user needs saving; last_login
+    # updates and other plain User saves must not rewrite (or even fetch) the profile
+    if User.profile.is_cached(instance) and instance.profile.has_changed():
+        instance.profile.save()
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    # Covers deactivation and password changes: the next request reloads the user
+    forget_user(instance)
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def forget_cached_profile(sender, instance, **kwargs):
+    forget_user(instance.user)
+
+
+# Points ledger
+
+@receiver(pre_save, sender=UserArticle)
+def snapshot_user_article_points(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        instance._points_before = points.snapshot_user_article(instance, update_fields)
+
+@receiver(post_save, sender=UserArticle)
+def update_user_article_points(sender, instance, raw=False, **kwargs):
+    if not raw:
+        points.record_user_article(instance, instance.__dict__.pop('_points_before', None))
+
+@receiver(post_save, sender=UserArticle)
+def drop_buffered_progress(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    # A page saved directly is newer than any buffered beacon
+    if not created and not raw and (update_fields is None or 'page_left_off' in update_fields):
+        progress.forget(instance.user_id, instance.pk)
+
+@receiver(post_delete, sender=UserArticle)
+def remove_user_article_points(sender, instance, **kwargs):
+    points.discard_user_article(instance)
+
+@receiver(pre_save, sender=Article)
+def snapshot_article_points(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        instance._points_before = points.snapshot_article(instance, update_fields)
+
+@receiver(post_save, sender=Article)
+def update_article_points(sender, instance, raw=False, **kwargs):
+    if not raw:
+        points.record_article(instance, instance.__dict__.pop('_points_before', None))
+
+@receiver(post_save, sender=UserFieldProgress)
+def initialise_progress_points(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        points.recalculate(UserFieldProgress.all_objects.filter(pk=instance.pk))
+        instance.refresh_from_db(fields=['current_points'])
+
+@receiver(m2m_changed, sender=UserProfile.preferred_fields.through)
+def initialise_interest_points(sender, instance, action, reverse, pk_set, **kwargs):
+    # preferred_fields.add()/set() bulk-create the through rows without post_save
+    if action != 'post_add' or not pk_set:
+        return
+    if reverse:
+        progress = UserFieldProgress.all_objects.filter(scientific_domain=instance, user_profile_id__in=pk_set)
+    else:
+        progress = UserFieldProgress.all_objects.filter(user_profile=instance, scientific_domain_id__in=pk_set)
+    points.recalculate(progress)
+
+
+# Review statistics
+
+@receiver(pre_save, sender=Review)
+def snapshot_review_score(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance._rating_before = ratings.snapshot_review(instance)
+
+@receiver(post_save, sender=Review)
+def update_review_stats(sender, instance, raw=False, **kwargs):
+    if not raw:
+        ratings.record_review_save(instance, instance.__dict__.pop('_rating_before', None))
+
+@receiver(post_delete, sender=Review)
+def remove_review_stats(sender, instance, **kwargs):
+    ratings.record_review_delete(instance)
+
+
+# Table versions for conditional GETs
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+@receiver(post_save, sender=ScientificDomain)
+@receiver(post_delete, sender=ScientificDomain)
+def bump_table_version(sender, **kwargs):
+    conditional.bump(sender._meta.model_name)
+
+
+# Eligibility snapshots
+
+@receiver(post_save, sender=UserFieldProgress)
+@receiver(post_delete, sender=UserFieldProgress)
+def invalidate_progress_eligibility(sender, instance, raw=False, **kwargs):
+    if not raw:
+        eligibility.invalidate(instance.user_profile.user_id)
+
+@receiver(m2m_changed, sender=UserProfile.preferred_fields.through)
+def invalidate_interest_eligibility(sender, instance, action, reverse, pk_set, **kwargs):
+    # Removing interests soft-deletes the through rows with a queryset update, no post_save
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        eligibility.invalidate(*UserProfile.objects.filter(pk__in=pk_set or ()).values_list('user_id', flat=True))
+    else:
+        eligibility.invalidate(instance.user_id)
+
+
+# Full-text search
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    if sender.name == 'api':
+        search.ensure_sqlite_index(connections[using])
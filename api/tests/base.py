@@ -0,0 +1,25 @@
+# api/tests/base.py
+
+from django.core.cache import caches
+from django.test import TestCase
+
+from api import progress
+
+
+class ApiTestCase(TestCase):
+    """
+    Starts every test with empty caches. Cached eligibility snapshots and users are keyed
+    by id, and ids are handed out again once a test's transaction is rolled back. Reading
+    positions a test buffered are dropped, or the atexit flush would write them to the
+    development database.
+    """
+
+    def setUp(self):
+        super().setUp()
+        for alias in caches:
+            caches[alias].clear()
+
+    def tearDown(self):
+        with progress._lock:
+            progress._pending.clear()
+        super().tearDown()
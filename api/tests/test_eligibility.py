@@ -0,0 +1,74 @@
+# api/tests/test_eligibility.py
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.models import Article, ScientificDomain, UserArticle
+from api.tests.base import ApiTestCase
+
+DOMAINS = 25
+
+
+class EligibilityQueryTests(ApiTestCase):
+    """The eligibility filters are one statement of the same SQL however many domains the user follows."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.domains = [ScientificDomain.objects.create(name=f'domain-{i}') for i in range(DOMAINS)]
+        for domain in cls.domains:
+            Article.objects.create(
+                scientific_domain=domain, title=f'{domain.name} basics', content='...', number_of_pages=1, points=5
+            )
+            Article.objects.create(
+                scientific_domain=domain, title=f'{domain.name} advanced', content='...', number_of_pages=1,
+                points=5, minimum_points=5,
+            )
+        cls.user = User.objects.create_user('reader', password='pw')
+        cls.user.profile.preferred_fields.add(cls.domains[0])
+        UserArticle.objects.create(
+            user=cls.user, article=Article.objects.get(title='domain-0 basics'), status='read'
+        )
+
+    def follow_all(self):
+        # Run the on-commit invalidation of the user's eligibility snapshot
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.profile.preferred_fields.add(*self.domains[1:])
+
+    def test_same_sql_for_one_and_many_domains(self):
+        for method in ('eligible_for', 'locked_for'):
+            with self.subTest(method):
+                one = str(getattr(Article.objects, method)(self.user).query)
+                self.follow_all()
+                many = str(getattr(Article.objects, method)(self.user).query)
+                self.user.profile.preferred_fields.remove(*self.domains[1:])
+                self.assertEqual(one, many)
+
+    def test_one_query_for_one_and_many_domains(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(len(Article.objects.eligible_for(self.user)), 2)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(Article.objects.locked_for(self.user)), 0)
+        self.follow_all()
+        with self.assertNumQueries(1):
+            self.assertEqual(len(Article.objects.eligible_for(self.user)), DOMAINS + 1)
+        with self.assertNumQueries(1):
+            self.assertEqual(len(Article.objects.locked_for(self.user)), DOMAINS - 1)
+
+    def test_list_endpoints_issue_the_same_queries(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def captured(path):
+            # The first request fills the user's eligibility cache
+            client.get(path)
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(client.get(path).status_code, 200)
+            return [query['sql'] for query in queries]
+
+        paths = ('/api/articles/', '/api/store-articles/')
+        one = [captured(path) for path in paths]
+        self.follow_all()
+        many = [captured(path) for path in paths]
+        self.assertEqual(one, many)
@@ -0,0 +1,68 @@
+# api/tests/test_interests.py
+
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+
+from api.interests import set_interests
+from api.models import ScientificDomain, UserFieldProgress
+from api.tests.base import ApiTestCase
+
+# The interests lookup, the seven of set_interests, and the interests and progress of the response
+PATCH_QUERIES = 10
+
+
+class SetInterestsQueryTests(ApiTestCase):
+    """A change of interests costs the same statements whether it touches one domain or fifty."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.domains = [ScientificDomain.objects.create(name=f'domain-{i:02}') for i in range(70)]
+        cls.user = User.objects.create_user('reader', password='pw')
+        profile = cls.user.profile
+        # 0-39 followed, 40-54 followed once and dropped, 55-69 never followed
+        UserFieldProgress.objects.bulk_create(
+            [UserFieldProgress(user_profile=profile, scientific_domain=domain, current_points=3)
+             for domain in cls.domains[:40]]
+            + [UserFieldProgress(user_profile=profile, scientific_domain=domain, current_points=7, active=False)
+               for domain in cls.domains[40:55]]
+        )
+        # Keep 0-19, remove 20-39, reactivate 40-54 and add 55-69: 50 changes
+        cls.wanted = cls.domains[:20] + cls.domains[40:]
+
+    def active_domains(self):
+        return set(
+            UserFieldProgress.all_objects.filter(user_profile=self.user.profile, active=True)
+            .values_list('scientific_domain_id', flat=True)
+        )
+
+    def test_fixed_statements_for_fifty_changes(self):
+        # SAVEPOINT, SELECT, UPDATE (remove), UPDATE (reactivate), INSERT, UPDATE (points), RELEASE
+        with self.assertNumQueries(7):
+            set_interests(self.user.profile, self.wanted)
+        self.assertEqual(self.active_domains(), {domain.pk for domain in self.wanted})
+        progress = UserFieldProgress.all_objects.filter(user_profile=self.user.profile)
+        # Reactivated rows get back their points, new ones start from the reading history
+        self.assertEqual(
+            set(progress.filter(scientific_domain__in=self.domains[40:55]).values_list('current_points', flat=True)), {7}
+        )
+        self.assertEqual(
+            set(progress.filter(scientific_domain__in=self.domains[55:]).values_list('current_points', flat=True)), {0}
+        )
+        self.assertEqual(progress.filter(active=False).count(), 20)
+
+    def test_patch_costs_the_same_for_three_and_fifty_changes(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+
+        def patch(domains):
+            with self.captureOnCommitCallbacks(execute=True), self.assertNumQueries(PATCH_QUERIES):
+                response = client.patch(
+                    '/api/profile/', {'interests': [domain.name for domain in domains]}, format='json'
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(sorted(response.data['interests']), sorted(domain.name for domain in domains))
+
+        # One removal, one reactivation and one new domain
+        patch(self.domains[:39] + [self.domains[40], self.domains[55]])
+        patch(self.wanted)
+        self.assertEqual(self.active_domains(), {domain.pk for domain in self.wanted})
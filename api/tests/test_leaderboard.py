@@ -0,0 +1,60 @@
+# api/tests/test_leaderboard.py
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+from api import leaderboard
+from api.models import ScientificDomain, UserFieldProgress
+from api.tests.base import ApiTestCase
+
+
+class LeaderboardTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.domain = ScientificDomain.objects.create(name='graphs')
+        cls.users = [User.objects.create_user(f'reader-{i}', password='pw') for i in range(4)]
+        # 40, 30, 30, 10
+        for user, points in zip(cls.users, (40, 30, 30, 10)):
+            UserFieldProgress.objects.create(user_profile=user.profile, scientific_domain=cls.domain)
+            UserFieldProgress.all_objects.filter(user_profile=user.profile).update(current_points=points)
+
+    def setUp(self):
+        super().setUp()
+        leaderboard._boards.clear()
+
+    def set_points(self, user, points, active=True):
+        UserFieldProgress.all_objects.filter(user_profile=user.profile).update(
+            current_points=points, active=active, changed_at=timezone.now()
+        )
+
+    def refreshed_standings(self, user):
+        # Let the board go stale, short of a full rebuild
+        board = leaderboard._boards[self.domain.pk]
+        board.built -= leaderboard.CACHE_TIMEOUT + 1
+        with mock.patch.object(leaderboard, 'build', side_effect=AssertionError("rebuilt")):
+            return leaderboard.standings(self.domain.pk, user)
+
+    def test_ranks_ties_and_participants(self):
+        standings = leaderboard.standings(self.domain.pk, self.users[2])
+        self.assertEqual(standings['participants'], 4)
+        self.assertEqual([entry['rank'] for entry in standings['top']], [1, 2, 2, 4])
+        self.assertEqual(standings['me'], {'rank': 2, 'points': 30})
+
+    def test_refresh_applies_changed_rows(self):
+        leaderboard.standings(self.domain.pk, self.users[0])
+        # The leader drops to the bottom, another reader leaves the domain
+        self.set_points(self.users[0], 5)
+        self.set_points(self.users[3], 10, active=False)
+
+        standings = self.refreshed_standings(self.users[0])
+        self.assertEqual(standings['participants'], 3)
+        self.assertEqual(standings['me'], {'rank': 3, 'points': 5})
+        self.assertEqual([(entry['rank'], entry['points']) for entry in standings['top']], [(1, 30), (1, 30), (3, 5)])
+
+    def test_own_points_come_from_the_board(self):
+        leaderboard.standings(self.domain.pk, self.users[0])
+        # Not refreshed yet: the old points and rank, consistent with the top slice
+        self.set_points(self.users[0], 5)
+        self.assertEqual(leaderboard.standings(self.domain.pk, self.users[0])['me'], {'rank': 1, 'points': 40})
@@ -0,0 +1,40 @@
+# api/tests/test_points.py
+
+from django.contrib.auth.models import User
+
+from api.models import Article, ScientificDomain, UserArticle, UserFieldProgress
+from api.points import reconcile
+from api.tests.base import ApiTestCase
+
+
+class PointsLedgerTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.domain = ScientificDomain.objects.create(name='graphs')
+        cls.user = User.objects.create_user('reader', password='pw')
+        cls.user.profile.preferred_fields.add(cls.domain)
+        cls.article = Article.objects.create(
+            scientific_domain=cls.domain, title='Cuts', content='...', number_of_pages=3, points=5
+        )
+        cls.user_article = UserArticle.objects.create(user=cls.user, article=cls.article, status='reading')
+
+    def current_points(self):
+        return UserFieldProgress.all_objects.get(user_profile=self.user.profile, scientific_domain=self.domain).current_points
+
+    def test_stale_instances_credit_a_read_once(self):
+        # Two requests that loaded the row before either marked it read
+        first = UserArticle.objects.get(pk=self.user_article.pk)
+        second = UserArticle.objects.get(pk=self.user_article.pk)
+        first.status = second.status = 'read'
+        first.save()
+        second.save()
+        self.assertEqual(self.current_points(), 5)
+
+    def test_reconcile_recomputes_drifted_rows(self):
+        self.user_article.status = 'read'
+        self.user_article.save()
+        UserFieldProgress.all_objects.filter(user_profile=self.user.profile).update(current_points=42)
+
+        drifted = [progress for _, chunk in reconcile() for progress in chunk]
+        self.assertEqual([progress.expected for progress in drifted], [5])
+        self.assertEqual(self.current_points(), 5)
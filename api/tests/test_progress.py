@@ -0,0 +1,49 @@
+# api/tests/test_progress.py
+
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+from api import progress
+from api.models import Article, ScientificDomain, UserArticle
+from api.tests.base import ApiTestCase
+
+
+@mock.patch.object(progress, 'start_flusher')
+class ProgressBufferTests(ApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        domain = ScientificDomain.objects.create(name='graphs')
+        article = Article.objects.create(
+            scientific_domain=domain, title='Cuts', content='...', number_of_pages=30, points=5
+        )
+        cls.user = User.objects.create_user('reader', password='pw')
+        cls.other = User.objects.create_user('other', password='pw')
+        cls.user_article = UserArticle.objects.create(user=cls.user, article=article, status='reading')
+
+    def page(self):
+        return UserArticle.objects.get(pk=self.user_article.pk).page_left_off
+
+    def test_flush_writes_the_buffered_page(self, start_flusher):
+        progress.record(self.user.pk, self.user_article.pk, 7)
+        self.assertEqual(progress.write_batch([(self.user.pk, self.user_article.pk)]), 1)
+        self.assertEqual(self.page(), 7)
+
+    def test_flush_skips_rows_of_another_user(self, start_flusher):
+        progress.record(self.other.pk, self.user_article.pk, 7)
+        self.assertEqual(progress.write_batch([(self.other.pk, self.user_article.pk)]), 0)
+        self.assertEqual(self.page(), 0)
+
+    def test_flush_never_overwrites_a_later_save(self, start_flusher):
+        progress.record(self.user.pk, self.user_article.pk, 7)
+        key = progress.buffer_key(self.user.pk, self.user_article.pk)
+        # A flush reads the beacon, then a PATCH saves a newer page and drops the buffer
+        buffered = cache.get(key)
+        user_article = UserArticle.objects.get(pk=self.user_article.pk)
+        user_article.page_left_off = 12
+        user_article.save(update_fields=['page_left_off', 'updated_at'])
+        cache.set(key, buffered)
+
+        self.assertEqual(progress.write_batch([(self.user.pk, self.user_article.pk)]), 0)
+        self.assertEqual(self.page(), 12)
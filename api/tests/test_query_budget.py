@@ -0,0 +1,194 @@
+# api/tests/test_query_budget.py
+
+import json
+from types import SimpleNamespace
+from unittest import skipUnless
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, reverse
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api import eligibility, urls
+from api.models import Article, UserArticle
+from api.seed import SEED_PASSWORD, seed
+from api.tests.base import ApiTestCase
+
+# Tables that must always be reached through an index on PostgreSQL
+INDEXED_TABLES = ('api_userarticle', 'api_review', 'api_article')
+
+# (route name, method, path, request body, queries, EXPLAIN the queries on PostgreSQL).
+# Paths and bodies are functions of the seeded context. Counts are for warm caches and
+# include the savepoints that stand in for the views' transactions inside a test.
+CHECKS = [
+    ('api-root', 'GET', lambda c: '/api/', None, 0, False),
+    ('profile', 'GET', lambda c: '/api/profile/', None, 2, False),
+    ('scientificdomain-list', 'GET', lambda c: '/api/scientific-domains/', None, 2, False),
+    ('scientificdomain-detail', 'GET', lambda c: f'/api/scientific-domains/{c.domain.pk}/', None, 2, False),
+    ('scientificdomain-leaderboard', 'GET', lambda c: f'/api/scientific-domains/{c.domain.pk}/leaderboard/', None,
+     1, False),
+    ('article-list', 'GET', lambda c: '/api/articles/', None, 2, True),
+    ('article-list', 'GET', lambda c: '/api/articles/?fields=title,scientific_domain', None, 2, True),
+    ('article-detail', 'GET', lambda c: f'/api/articles/{c.article.pk}/', None, 2, True),
+    ('article-overview', 'GET', lambda c: f'/api/articles/{c.article.pk}/detail/', None, 3, True),
+    ('article-search', 'GET', lambda c: '/api/articles/search/?q=graphs', None, 1, False),
+    ('article-top', 'GET', lambda c: f'/api/articles/top/?domain={c.article.scientific_domain_id}', None, 1, True),
+    # Seeded articles have no file: the download answers 404 after the permission check
+    ('article-download', 'GET', lambda c: f'/api/articles/{c.article.pk}/download/', None, 1, False),
+    ('store-articles', 'GET', lambda c: '/api/store-articles/', None, 1, True),
+    ('recommendations', 'GET', lambda c: '/api/recommendations/', None, 1, True),
+    ('metrics', 'GET', lambda c: '/api/metrics/', None, 0, False),
+    ('user-article-list', 'GET', lambda c: '/api/user-articles/', None, 1, True),
+    ('user-article-list', 'GET', lambda c: f'/api/user-articles/?article={c.article.pk}', None, 1, True),
+    ('user-article-detail', 'GET', lambda c: f'/api/user-articles/{c.user_article.pk}/', None, 1, True),
+    ('reviews-list', 'GET', lambda c: '/api/reviews/', None, 1, True),
+    ('reviews-detail', 'GET', lambda c: f'/api/reviews/{c.review.pk}/', None, 1, True),
+    # Writes, after every read so stale per-user caches can't affect the reads.
+    # The first beacon of a row checks its owner; later ones take no query
+    ('user-article-progress', 'POST', lambda c: f'/api/user-articles/{c.user_article.pk}/progress/',
+     lambda c: {'page_left_off': 3}, 1, False),
+    ('user-article-detail', 'PATCH', lambda c: f'/api/user-articles/{c.user_article.pk}/',
+     lambda c: {'page_left_off': 4}, 5, False),
+    ('user-article-list', 'POST', lambda c: '/api/user-articles/', lambda c: {'article': c.unread.pk}, 3, False),
+    ('user-article-batch', 'POST', lambda c: '/api/user-articles/batch/',
+     lambda c: [{'id': c.user_article.pk, 'page_left_off': 5}], 4, False),
+    ('reviews-list', 'POST', lambda c: '/api/reviews/', lambda c: {'article': c.article.pk, 'score': 7}, 10, False),
+    ('profile', 'PATCH', lambda c: '/api/profile/', lambda c: {'first_name': 'Ada'}, 3, False),
+    # The PATCH above dropped the cached user, so authentication reads it again
+    ('register', 'POST', lambda c: '/api/register/',
+     lambda c: {'username': 'budget-new', 'password': 'x', 'interests': [c.domain.name]}, 10, False),
+    # Two rows, so the passwords are hashed in the process pool. The staff user is still
+    # cached from the metrics request
+    ('register-bulk', 'POST', lambda c: '/api/register/bulk/',
+     lambda c: [{'username': f'budget-bulk-{i}', 'password': 'x', 'interests': [c.domain.name]} for i in range(2)],
+     7, False),
+    ('token_obtain_pair', 'POST', lambda c: '/api/token/',
+     lambda c: {'username': c.user.username, 'password': SEED_PASSWORD}, 1, False),
+    ('token_refresh', 'POST', lambda c: '/api/token/refresh/', lambda c: {'refresh': c.refresh}, 1, False),
+]
+
+# Routes requested as a staff user
+STAFF_ROUTES = {'register-bulk', 'metrics'}
+
+# Changelist queries per model admin: session, user, count, page and the filters' choices
+ADMIN_QUERIES = {
+    'auth.Group': 5,
+    'auth.User': 6,
+    'api.ScientificDomain': 5,
+    'api.UserProfile': 4,
+    'api.UserFieldProgress': 5,
+    'api.Article': 5,
+    'api.UserArticle': 5,
+    'api.Review': 4,
+}
+
+
+class QueryBudgetTests(ApiTestCase):
+    """
+    Requests every route of api/urls.py and every admin changelist over a seeded dataset
+    and checks how many queries each takes. On PostgreSQL the queries of the key endpoints
+    are also EXPLAINed with sequential scans disabled, and a Seq Scan over UserArticle,
+    Review or Article fails.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        # Including the table versions seed() bumps on commit
+        with cls.captureOnCommitCallbacks(execute=True):
+            dataset = seed(users=50, articles=500, prefix='budget')
+        user = dataset.users[0]
+        points = eligibility.domain_points(user)
+        readable = Article.objects.filter(
+            scientific_domain_id__in=points, minimum_points__isnull=True
+        ).order_by('id')
+        article = readable.filter(user_articles__user=user, user_articles__status='read').first() or readable.first()
+        # A page change of an unread row; reading state changes also touch the ledger
+        user_article = UserArticle.objects.filter(user=user, status='reading').exclude(article=article).order_by('id').first()
+        # Review POST requires a read article
+        UserArticle.objects.update_or_create(user=user, article=article, defaults={'status': 'read'})
+        staff = User.objects.create_superuser('budget-admin', 'budget-admin@example.com', SEED_PASSWORD)
+        cls.context = SimpleNamespace(
+            user=user,
+            staff=staff,
+            domain=dataset.domains[0],
+            article=article,
+            unread=readable.exclude(user_articles__user=user).first(),
+            user_article=user_article,
+            review=user.reviews.order_by('id').first() or user.reviews.create(article=article, score=5),
+            token=str(AccessToken.for_user(user)),
+            staff_token=str(AccessToken.for_user(staff)),
+            refresh=str(RefreshToken.for_user(user)),
+        )
+
+    def request(self, client, name, method, path, body):
+        token = self.context.staff_token if name in STAFF_ROUTES else self.context.token
+        kwargs = {'HTTP_AUTHORIZATION': f'Bearer {token}', 'content_type': 'application/json'}
+        if body is not None:
+            kwargs['data'] = json.dumps(body(self.context))
+        return getattr(client, method.lower())(path(self.context), **kwargs)
+
+    def test_every_route_has_a_budget(self):
+        self.assertEqual(route_names(urls.urlpatterns) - {check[0] for check in CHECKS}, set())
+
+    def test_endpoint_queries(self):
+        client = Client()
+        for name, method, path, body, queries, _ in CHECKS:
+            with self.subTest(name=name, method=method, path=path(self.context)):
+                if method == 'GET':
+                    # Warm the per-user caches the counts assume
+                    self.request(client, name, method, path, body)
+                # Including the work deferred until the view's transaction commits
+                with self.assertNumQueries(queries), self.captureOnCommitCallbacks(execute=True):
+                    response = self.request(client, name, method, path, body)
+                self.assertLess(response.status_code, 500)
+
+    def test_admin_changelist_queries(self):
+        client = Client()
+        client.force_login(self.context.staff)
+        for model in admin.site._registry:
+            path = reverse(f'admin:{model._meta.app_label}_{model._meta.model_name}_changelist')
+            with self.subTest(path=path):
+                client.get(path)
+                with self.assertNumQueries(ADMIN_QUERIES[model._meta.label]):
+                    self.assertEqual(client.get(path).status_code, 200)
+
+    @skipUnless(connection.vendor == 'postgresql', "Query plans are checked on PostgreSQL")
+    def test_key_endpoints_use_indexes(self):
+        client = Client()
+        for name, method, path, body, _, explain in CHECKS:
+            if not explain:
+                continue
+            self.request(client, name, method, path, body)
+            with CaptureQueriesContext(connection) as captured:
+                self.request(client, name, method, path, body)
+            with self.subTest(path=path(self.context)), connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                for query in captured.captured_queries:
+                    sql = query['sql']
+                    if not sql.lstrip().upper().startswith('SELECT') or not any(t in sql for t in INDEXED_TABLES):
+                        continue
+                    cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                    plan = cursor.fetchone()[0]
+                    scanned = set(seq_scans(plan[0]['Plan'])) & set(INDEXED_TABLES)
+                    self.assertFalse(scanned, f"sequential scan on {', '.join(sorted(scanned))}: {sql[:200]}")
+                cursor.execute('SET LOCAL enable_seqscan = on')
+
+
+def route_names(patterns):
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= route_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+def seq_scans(node):
+    if node.get('Node Type') == 'Seq Scan':
+        yield node.get('Relation Name')
+    for child in node.get('Plans', ()):
+        yield from seq_scans(child)
@@ -0,0 +1,27 @@
+# api/tests/test_search.py
+
+from api.models import Article, ScientificDomain
+from api.search import substring_search
+from api.tests.base import ApiTestCase
+
+
+class SubstringSearchTests(ApiTestCase):
+    """The fallback used on databases without a full-text index."""
+
+    @classmethod
+    def setUpTestData(cls):
+        domain = ScientificDomain.objects.create(name='graphs')
+        cls.titled, cls.body, cls.unrelated = (
+            Article.objects.create(scientific_domain=domain, title=title, content=content, number_of_pages=1, points=1)
+            for title, content in (
+                ('Minimum cuts in graphs', 'Flows.'),
+                ('Flows', 'Minimum cuts of planar graphs.'),
+                ('Sorting', 'Merging runs.'),
+            )
+        )
+
+    def test_every_term_must_match_and_title_matches_rank_first(self):
+        results = substring_search(Article.objects.all(), ['GRAPHS', 'cuts']).order_by('-rank', 'id')
+        self.assertEqual(
+            [(article.pk, article.rank) for article in results], [(self.titled.pk, 2.0), (self.body.pk, 0.0)]
+        )
@@ -1,13 +1,17 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     RegisterView,
+    BulkRegisterView,
     ProfileView,
     ScientificDomainViewSet,
     ArticleViewSet,
     UserArticleViewSet,
     ReviewViewSet,
-    StoreArticleListView
+    StoreArticleListView,
+    RecommendationListView,
+    MetricsView
 )
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
@@ -19,9 +23,23 @@ router.register(r'reviews', ReviewViewSet, basename='reviews')
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
+    path('register/bulk/', BulkRegisterView.as_view(), name='register-bulk'),
     path('profile/', ProfileView.as_view(), name='profile'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('store-articles/', StoreArticleListView.as_view(), name='store-articles'),
+    path('recommendations/', RecommendationListView.as_view(), name='recommendations'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
 ]
+
+if settings.API_ASYNC_VIEWS:
+    from .async_views import ArticleListView, ArticleDetailView, AsyncProfileView, UserArticleProgressView
+
+    # Matched before the router; the views hand other methods back to the viewsets
+    urlpatterns = [
+        path('articles/', ArticleListView.as_view(), name='article-list'),
+        path('articles/<int:pk>/', ArticleDetailView.as_view(), name='article-detail'),
+        path('profile/', AsyncProfileView.as_view(), name='profile'),
+        path('user-articles/<int:pk>/', UserArticleProgressView.as_view(), name='user-article-detail'),
+    ] + urlpatterns
@@ -1,19 +1,31 @@
-from django.db import IntegrityError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.db.models import Q
 from rest_framework import viewsets, permissions, generics
-from django.db.models import Min
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from django.db.models import Min, Sum
 
 from . import models
 from .models import ScientificDomain, Article, UserArticle, UserFieldProgress, Review
-from .permissions import CanAccessArticle
+from .provisioning import provision_users
+from .pagination import KeysetPagination, RecentKeysetPagination, SearchPagination
+from .permissions import CanAccessArticle, IsMetricsClient
+from . import leaderboard, metrics, progress, ratings, reading
+from .authentication import CachedJWTAuthentication, MetricsTokenAuthentication
+from .conditional import ConditionalGetMixin
+from .routing import ReplicaReadMixin
+from .files import serve_article_file
+from .search import search
 from .serializers import (
-    ScientificDomainSerializer, ArticleSerializer,
-    UserArticleSerializer, UserSerializer, RegisterSerializer, ReviewSerializer, StoreArticleSerializer
+    ScientificDomainSerializer, ArticleSerializer, ArticleListSerializer,
+    UserArticleSerializer, UserSerializer, RegisterSerializer, ProvisionUserSerializer, ReviewSerializer,
+    StoreArticleSerializer, ProgressBeaconSerializer, StartReadingSerializer, UserArticleChangeSerializer
 )
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
+from django.http import HttpResponse
 
 # Existing Views
 class RegisterView(APIView):
@@ -26,7 +38,20 @@ class RegisterView(APIView):
             return Response({"message": "User created successfully"}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-class ProfileView(APIView):
+class BulkRegisterView(APIView):
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = ProvisionUserSerializer(data=request.data, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            created = provision_users(serializer.validated_data)
+        except DjangoValidationError as exc:
+            return Response(exc.message_dict, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"message": f"{created} users created successfully"}, status=status.HTTP_201_CREATED)
+
+class ProfileView(ReplicaReadMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
@@ -43,19 +68,32 @@ class ProfileView(APIView):
 
 # New ViewSets
 
-class ScientificDomainViewSet(viewsets.ModelViewSet):
+class ScientificDomainViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = ScientificDomain.objects.all()
     serializer_class = ScientificDomainSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
+    version_tables = ('scientificdomain',)
+
+    @action(detail=True, methods=['get'])
+    def leaderboard(self, request, pk=None):
+        """Top readers of the domain by points (?limit=, at most 100) and the user's own rank."""
+        domain = self.get_object()
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), leaderboard.TOP_SIZE) if limit.isdigit() else 10
+        return Response(leaderboard.standings(domain.pk, request.user, limit))
 
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ReplicaReadMixin, ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Article.objects.select_related('scientific_domain').all()
     serializer_class = ArticleSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly, CanAccessArticle]
+    pagination_class = KeysetPagination
+    # Domain names are part of the article representation
+    version_tables = ('article', 'scientificdomain')
+    per_user = True
 
     def get_permissions(self):
-        if self.action in ['retrieve']:
+        if self.action in ['retrieve', 'download', 'overview']:
             self.permission_classes = [permissions.IsAuthenticated, CanAccessArticle]
         elif self.action in ['create', 'update', 'partial_update', 'destroy']:
             self.permission_classes = [permissions.IsAdminUser]
@@ -63,6 +101,12 @@ class ArticleViewSet(viewsets.ModelViewSet):
             self.permission_classes = [permissions.IsAuthenticatedOrReadOnly]
         return super(ArticleViewSet, self).get_permissions()
 
+    def get_serializer_class(self):
+        # The compact list leaves out the article body unless ?fields= asks for it
+        if self.action in ('list', 'search', 'top') and not ArticleSerializer.requested_fields(self.request):
+            return ArticleListSerializer
+        return ArticleSerializer
+
     def get_queryset(self):
         """
         Override the default queryset to filter articles based on the user's active interests
@@ -71,45 +115,125 @@ class ArticleViewSet(viewsets.ModelViewSet):
         queryset = super().get_queryset()
         user = self.request.user
 
-        if user.is_authenticated:
-            # Retrieve only active UserFieldProgress entries
-            active_progress = UserFieldProgress.objects.filter(
-                user_profile=user.profile,
-                active=True
-            ).select_related('scientific_domain')
-
-            if not active_progress.exists():
-                # If no active progress, return no articles
-                return Article.objects.none()
-
-            # Create a mapping of domain_id to current_points
-            domain_points_map = {
-                progress.scientific_domain_id: progress.current_points
-                for progress in active_progress
-            }
-
-            # Build Q conditions based on active domains and points
-            q_conditions = Q()
-            for domain_id, current_points in domain_points_map.items():
-                q_conditions |= (
-                    Q(scientific_domain_id=domain_id) &
-                    (
-                        Q(minimum_points__lte=current_points) |
-                        Q(minimum_points__isnull=True)
-                    )
-                )
-
-            # Filter the queryset based on the Q conditions
-            queryset = queryset.filter(q_conditions)
+        if user.is_authenticated and self.action not in ('retrieve', 'download', 'overview'):
+            # The same SQL however many domains the user follows; single objects are checked by
+            # CanAccessArticle against the cached eligibility snapshot
+            queryset = queryset.eligible_for(user)
+
+        return self.select_columns(queryset, self.request, compact=self.action in ('list', 'search', 'top'))
+
+    @staticmethod
+    def select_columns(queryset, request, compact):
+        # Only select the columns the response will contain; CanAccessArticle needs minimum_points
+        fields = ArticleSerializer.requested_fields(request)
+        if fields:
+            return queryset.only('scientific_domain__name', 'minimum_points', *ArticleSerializer.columns_for(fields))
+        if compact:
+            return queryset.defer('content')
+        return queryset
+
+    @action(detail=False, methods=['get'], pagination_class=SearchPagination)
+    def search(self, request):
+        """
+        Ranked full-text search over title and content, limited to the articles
+        the user is eligible to read.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise ValidationError({'q': 'This query parameter is required.'})
+
+        page = self.paginate_queryset(search(self.get_queryset(), query))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        The article's file, with Range/If-Range support so readers can resume near the
+        page they left off instead of downloading the whole file again.
+        """
+        return serve_article_file(request, self.get_object())
+
+    @action(detail=False, methods=['get'])
+    def top(self, request):
+        """
+        Best-rated articles of one domain by Bayesian average, read straight off the
+        (scientific_domain, -review_rating, id) index.
+        """
+        domain = request.query_params.get('domain')
+        if not domain or not domain.isdigit():
+            raise ValidationError({'domain': 'A scientific domain id is required.'})
+        limit = request.query_params.get('limit', '')
+        limit = min(int(limit), 100) if limit.isdigit() else 10
+
+        articles = self.get_queryset().filter(
+            scientific_domain_id=domain, review_count__gt=0
+        ).order_by('-review_rating', 'id')[:limit]
+        serializer = self.get_serializer(articles, many=True)
+        return Response(serializer.data)
 
+    @action(detail=True, methods=['get'], url_path='detail')
+    def overview(self, request, pk=None):
+        """
+        Everything the article page shows in one response: the article, the caller's
+        reading state and review, and the review summary. Three queries.
+        """
+        article = self.get_object()
+        user_article = UserArticle.objects.filter(user=request.user, article=article).first()
+        if user_article:
+            progress.buffered_pages([user_article])
+        review = Review.objects.filter(user=request.user, article=article).first()
+        context = self.get_serializer_context()
+        return Response({
+            'article': ArticleSerializer(article, context=context).data,
+            'user_article': UserArticleSerializer(user_article, context=context).data if user_article else None,
+            'review': ReviewSerializer(review, context=context).data if review else None,
+            'review_summary': ratings.summary(article),
+        })
+
+
+def filter_by_article(queryset, request):
+    """?article=<id>, answered from the (user, article) unique index."""
+    article = request.query_params.get('article')
+    if article is None:
         return queryset
+    if not article.isdigit():
+        raise ValidationError({'article': 'An article id is required.'})
+    return queryset.filter(article_id=article)
+
 #
-class UserArticleViewSet(viewsets.ModelViewSet):
+class UserArticleViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     serializer_class = UserArticleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    lookup_value_regex = r'\d+'
 
     def get_queryset(self):
-        return UserArticle.objects.filter(user=self.request.user)
+        return filter_by_article(UserArticle.objects.filter(user=self.request.user), self.request)
+
+    # Reading positions may still be waiting in the progress buffer
+    def get_object(self):
+        return progress.buffered_pages([super().get_object()])[0]
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return progress.buffered_pages(page) if page is not None else None
+
+    @action(detail=True, methods=['post'])
+    def progress(self, request, pk=None):
+        """
+        Reading-position beacon, sent on every page turn. The page is buffered and written
+        in batches (see api.progress). Only the first beacon for a row checks that it is the
+        user's; later ones find their buffered page and answer without touching the database.
+        Status changes still go through PATCH.
+        """
+        serializer = ProgressBeaconSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pk = int(pk)
+        if not progress.is_buffered(request.user.pk, pk) and not self.get_queryset().filter(pk=pk).exists():
+            raise NotFound()
+        progress.record(request.user.pk, pk, serializer.validated_data['page_left_off'])
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
     def get_serializer_context(self):
         context = super(UserArticleViewSet, self).get_serializer_context()
@@ -117,44 +241,94 @@ class UserArticleViewSet(viewsets.ModelViewSet):
         return context
 
     def create(self, request, *args, **kwargs):
-        article = request.data.get('article')
-        if UserArticle.objects.filter(article=article).exists():
-            instance = UserArticle.objects.get(article=article)
-            serializer = self.get_serializer(instance)
-            return Response(serializer.data, status=status.HTTP_200_OK)
-
-        # Otherwise, create a new resource
-        return super().create(request, *args, **kwargs)
-
-    def perform_create(self, serializer):
-        serializer.save(user=self.request.user)
-
-
-class ReviewViewSet(viewsets.ModelViewSet):
+        """Start reading an article, or return the existing row (200) if already started."""
+        serializer = StartReadingSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        try:
+            user_article, created = reading.start_reading(
+                request.user, data['article'], data['status'], data['page_left_off']
+            )
+        except Article.DoesNotExist:
+            raise ValidationError({'article': [f'Invalid pk "{data["article"]}" - object does not exist.']})
+        return Response(
+            self.get_serializer(user_article).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """
+        Apply a list of {id, status?, page_left_off?} changes to the user's rows in one
+        transaction; later entries for the same id win.
+        """
+        serializer = UserArticleChangeSerializer(data=request.data, many=True, max_length=reading.BATCH_SIZE)
+        serializer.is_valid(raise_exception=True)
+        changes = {}
+        for change in serializer.validated_data:
+            changes.setdefault(change.pop('id'), {}).update(change)
+        try:
+            user_articles = reading.apply_changes(request.user, changes)
+        except UserArticle.DoesNotExist as exc:
+            raise ValidationError({'id': [f'No reading entry with id {pk}.' for pk in exc.args[0]]})
+        return Response(self.get_serializer(user_articles, many=True).data)
+
+
+class ReviewViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
     queryset = Review.objects.all()
     serializer_class = ReviewSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = RecentKeysetPagination
 
     def get_queryset(self):
-        return Review.objects.filter(user=self.request.user)
+        return filter_by_article(Review.objects.filter(user=self.request.user), self.request)
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class StoreArticleListView(generics.ListAPIView):
+class StoreArticleListView(ReplicaReadMixin, generics.ListAPIView):
     serializer_class = StoreArticleSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        return Article.objects.locked_for(self.request.user)
+
+
+class RecommendationListView(ReplicaReadMixin, generics.ListAPIView):
+    """
+    Articles similar to the ones the user has interacted with, scored by the summed
+    similarity from the precomputed ArticleSimilarity table. Restricted to eligible
+    articles the user hasn't opened yet. Users without history get the best-rated articles.
+    """
+    serializer_class = ArticleListSerializer
+    permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
-        user_progress = UserFieldProgress.objects.filter(user_profile=user.profile, active=True)
+        limit = self.request.query_params.get('limit', '')
+        limit = min(int(limit), 100) if limit.isdigit() else 20
+
+        eligible = Article.objects.eligible_for(user).select_related('scientific_domain').defer('content')
+        recommended = eligible.filter(
+            neighbour_of__article__user_articles__user=user
+        ).exclude(
+            user_articles__user=user
+        ).annotate(
+            recommendation_score=Sum('neighbour_of__score')
+        ).order_by('-recommendation_score', 'id')[:limit]
+
+        articles = list(recommended)
+        if not articles:
+            articles = list(eligible.exclude(user_articles__user=user).order_by('-review_rating', 'id')[:limit])
+        return articles
 
-        q_conditions = Q()
-        for progress in user_progress:
-            q_conditions |= Q(
-                scientific_domain=progress.scientific_domain,
-                minimum_points__gt=progress.current_points
-            )
 
-        return Article.objects.filter(q_conditions).distinct()
\ No newline at end of file
+class MetricsView(APIView):
+    """Prometheus scrape target; see api.metrics."""
+    authentication_classes = [MetricsTokenAuthentication, CachedJWTAuthentication]
+    permission_classes = [IsMetricsClient]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
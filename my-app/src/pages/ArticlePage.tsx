@@ -17,9 +17,8 @@ interface Article {
 
 interface Review {
   id: number;
-  user: string;
+  article: number;
   score: number;
-  created_at: string;
 }
 
 interface UserArticle {
@@ -29,55 +28,62 @@ interface UserArticle {
   page_left_off: number;
 }
 
+interface ReviewSummary {
+  count: number;
+  average: number | null;
+  rating: number;
+}
+
+interface ArticleDetail {
+  article: Article;
+  user_article: UserArticle | null;
+  review: Review | null;
+  review_summary: ReviewSummary;
+}
+
 
 
 const ArticlePage: React.FC = () => {
   const { accessToken, logout } = useAuth();
   const { id } = useParams<{ id: string }>();
   const [article, setArticle] = useState<Article | null>(null);
-  const [reviews, setReviews] = useState<Review[]>([]);
+  const [review, setReview] = useState<Review | null>(null);
+  const [reviewSummary, setReviewSummary] = useState<ReviewSummary | null>(null);
   const [userArticle, setUserArticle] = useState<UserArticle | null>(null);
   const [isLoading, setIsLoading] = useState<boolean>(true);
   const [userReview, setUserReview] = useState<number | null>(null);
+  const [fileUrl, setFileUrl] = useState<string | null>(null);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const articleResponse = await fetch(`http://localhost:8000/api/articles/${id}/`, {
+        // The article, our reading state and review, and the review summary in one request
+        const detailResponse = await fetch(`http://localhost:8000/api/articles/${id}/detail/`, {
           headers: {
             'Content-Type': 'application/json',
             Authorization: `Bearer ${accessToken}`,
           },
         });
 
-        if (articleResponse.ok) {
-          const data: Article = await articleResponse.json();
-          setArticle(data);
-        } else if (articleResponse.status === 401) {
+        if (detailResponse.status === 401) {
           logout();
           return;
-        } else {
+        } else if (!detailResponse.ok) {
           toast.error('Failed to fetch the article.');
           return;
         }
 
-        const reviewsResponse = await fetch(`http://localhost:8000/api/reviews/?article_id=${id}`, {
-          headers: {
-            'Content-Type': 'application/json',
-            Authorization: `Bearer ${accessToken}`,
-          },
-        });
-
-        if (reviewsResponse.ok) {
-          const data: Review[] = await reviewsResponse.json();
-          setReviews(data);
-        } else if (reviewsResponse.status === 401) {
-          logout();
-        } else {
-          toast.error('Failed to fetch reviews.');
+        const data: ArticleDetail = await detailResponse.json();
+        setArticle(data.article);
+        setReview(data.review);
+        setUserReview(data.review?.score ?? null);
+        setReviewSummary(data.review_summary);
+        setUserArticle(data.user_article);
+        if (data.user_article) {
+          return;
         }
 
-        // Tell the server we started reading
+        // First visit: tell the server we started reading
         const readingResponse = await fetch(`http://localhost:8000/api/user-articles/`, {
           method: "POST",
           headers: {
@@ -111,6 +117,32 @@ const ArticlePage: React.FC = () => {
     }
   }, [accessToken, logout, id]);
 
+  // The download URL needs our bearer token, which an iframe can't send: fetch the file
+  // and show it from a blob URL instead
+  useEffect(() => {
+    if (!article?.file || !accessToken) {
+      return;
+    }
+    let objectUrl: string | null = null;
+    let cancelled = false;
+    fetch(article.file, { headers: { Authorization: `Bearer ${accessToken}` } })
+      .then((response) => (response.ok ? response.blob() : Promise.reject(response.status)))
+      .then((blob) => {
+        if (!cancelled) {
+          objectUrl = URL.createObjectURL(blob);
+          setFileUrl(objectUrl);
+        }
+      })
+      .catch(() => toast.error('Failed to load the article file.'));
+    return () => {
+      cancelled = true;
+      if (objectUrl) {
+        URL.revokeObjectURL(objectUrl);
+      }
+      setFileUrl(null);
+    };
+  }, [article?.file, accessToken]);
+
   const handleReviewSubmit = async (e: FormEvent) => {
     e.preventDefault();
 
@@ -134,7 +166,7 @@ const ArticlePage: React.FC = () => {
 
       if (response.ok || response.status === 201) {
         const newReview: Review = await response.json();
-        setReviews([newReview, ...reviews.filter(review => review.user !== newReview.user)]);
+        setReview(newReview);
         toast.success('Review submitted successfully.');
       } else if (response.status === 401) {
         logout();
@@ -215,23 +247,26 @@ const handleMarkAsRead = async () => {
                 Submit Review
               </button>
             </form>
-            <ul style={styles.reviewsList}>
-              {reviews.map((review) => (
-                <li key={review.id} style={styles.reviewItem}>
-                  <p>
-                    <strong>{review.user}</strong> <em>({new Date(review.created_at).toLocaleString()})</em>
-                  </p>
-                  <p>Score: {review.score}</p>
-                </li>
-              ))}
-            </ul>
+            {reviewSummary && (
+              <p>
+                <strong>Rating:</strong>{' '}
+                {reviewSummary.count
+                  ? `${reviewSummary.average} / 10 from ${reviewSummary.count} review${reviewSummary.count === 1 ? '' : 's'}`
+                  : 'No reviews yet'}
+              </p>
+            )}
+            {review && (
+              <div style={styles.reviewItem}>
+                <p>Your score: {review.score}</p>
+              </div>
+            )}
           </div>
 
           {/* Right Section */}
           <div style={styles.iframeContainer}>
-            {article.file && (
+            {fileUrl && (
               <iframe
-                src={`${article.file}`}
+                src={fileUrl}
                 title="PDF Viewer"
                 style={styles.iframe}
               ></iframe>
@@ -289,10 +324,6 @@ const styles: { [key: string]: React.CSSProperties } = {
     cursor: 'not-allowed',
     opacity: 0.6,
   },
-  reviewsList: {
-    listStyle: 'none',
-    padding: 0,
-  },
   reviewItem: {
     borderBottom: '1px solid #ddd',
     marginBottom: '10px',
@@ -1,13 +1,17 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { useNavigate } from 'react-router-dom';
 import { toast } from 'react-toastify';
 
+interface Page<T> {
+  next: string | null;
+  results: T[];
+}
+
 interface Article {
   id: number;
   scientific_domain: string;
   title: string;
-  content: string;
   number_of_pages: number;
   points: number;
   minimum_points?: number;
@@ -19,6 +23,27 @@ const HomePage: React.FC = () => {
 
   const [articles, setArticles] = useState<Article[]>([]);
   const [isLoading, setIsLoading] = useState<boolean>(true);
+  // Cursor of the following page of articles, null on the last one
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
+  const [isLoadingMore, setIsLoadingMore] = useState<boolean>(false);
+
+  const fetchArticlePage = useCallback(async (url: string): Promise<Page<Article> | null> => {
+    const response = await fetch(url, {
+      headers: {
+        'Content-Type': 'application/json',
+        Authorization: `Bearer ${accessToken}`,
+      },
+    });
+    if (response.ok) {
+      return response.json();
+    }
+    if (response.status === 401) {
+      logout();
+    } else {
+      toast.error('Failed to fetch articles.');
+    }
+    return null;
+  }, [accessToken, logout]);
 
   useEffect(() => {
     const fetchProfile = async () => {
@@ -45,20 +70,10 @@ const HomePage: React.FC = () => {
 
     const fetchArticles = async () => {
       try {
-        const response = await fetch('http://localhost:8000/api/articles/', {
-          headers: {
-            'Content-Type': 'application/json',
-            Authorization: `Bearer ${accessToken}`,
-          },
-        });
-
-        if (response.ok) {
-          const data: Article[] = await response.json();
-          setArticles(data);
-        } else if (response.status === 401) {
-          logout();
-        } else {
-          toast.error('Failed to fetch articles.');
+        const data = await fetchArticlePage('http://localhost:8000/api/articles/');
+        if (data) {
+          setArticles(data.results);
+          setNextUrl(data.next);
         }
       } catch (error) {
         console.error('Error fetching articles:', error);
@@ -74,7 +89,26 @@ const HomePage: React.FC = () => {
     } else {
       setIsLoading(false);
     }
-  }, [accessToken, logout]);
+  }, [accessToken, logout, fetchArticlePage]);
+
+  const loadMore = async () => {
+    if (!nextUrl) {
+      return;
+    }
+    setIsLoadingMore(true);
+    try {
+      const data = await fetchArticlePage(nextUrl);
+      if (data) {
+        setArticles((previous) => [...previous, ...data.results]);
+        setNextUrl(data.next);
+      }
+    } catch (error) {
+      console.error('Error fetching articles:', error);
+      toast.error('An error occurred while fetching articles.');
+    } finally {
+      setIsLoadingMore(false);
+    }
+  };
 
   const handleButtonClick = (articleId: number) => {
   navigate(`/articles/${articleId}`);
@@ -112,9 +146,6 @@ const HomePage: React.FC = () => {
                   <strong>Min Points Required:</strong> {article.minimum_points}
                 </p>
               )}
-              <p>
-                <strong>Content:</strong> {article.content}
-              </p>
               <button onClick={() => handleButtonClick(article.id)} style={styles.button}>
                 Go to Article
               </button>
@@ -123,6 +154,12 @@ const HomePage: React.FC = () => {
         </ul>
       )}
 
+      {nextUrl && (
+        <button onClick={loadMore} disabled={isLoadingMore} style={styles.button}>
+          {isLoadingMore ? 'Loading...' : 'Load more articles'}
+        </button>
+      )}
+
       <button onClick={() => navigate('/store-articles')} style={styles.storeButton}>
         Go to Store Articles
       </button>
@@ -1,64 +1,98 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { useAuth } from '../contexts/AuthContext';
 import { toast } from 'react-toastify';
 
+interface Page<T> {
+  next: string | null;
+  results: T[];
+}
+
 interface Article {
   id: number;
   title: string;
   scientific_domain: string;
   points: number;
   minimum_points: number;
-  file_path: string;
+  file_path: string | null;
 }
 
 const StoreArticles: React.FC = () => {
   const { accessToken, logout } = useAuth();
   const [articles, setArticles] = useState<Article[]>([]);
   const [isLoading, setIsLoading] = useState<boolean>(true);
+  // Cursor of the following page of articles, null on the last one
+  const [nextUrl, setNextUrl] = useState<string | null>(null);
 
-  useEffect(() => {
-    const fetchArticles = async () => {
-      try {
-        const response = await fetch('http://localhost:8000/api/store-articles/', {
-          headers: {
-            'Content-Type': 'application/json',
-            Authorization: `Bearer ${accessToken}`,
-          },
-        });
+  // Fetch one page and append it (replace on the first page)
+  const fetchArticles = useCallback(async (url: string, append: boolean) => {
+    setIsLoading(true);
+    try {
+      const response = await fetch(url, {
+        headers: {
+          'Content-Type': 'application/json',
+          Authorization: `Bearer ${accessToken}`,
+        },
+      });
 
-        if (response.ok) {
-          const data: Article[] = await response.json();
-          setArticles(data);
-        } else if (response.status === 401) {
-          logout();
-        } else {
-          toast.error('Failed to fetch articles.');
-        }
-        // eslint-disable-next-line @typescript-eslint/no-unused-vars
-      } catch (error) {
-        toast.error('An error occurred while fetching articles.');
-      } finally {
-        setIsLoading(false);
+      if (response.ok) {
+        const data: Page<Article> = await response.json();
+        setArticles((previous) => (append ? [...previous, ...data.results] : data.results));
+        setNextUrl(data.next);
+      } else if (response.status === 401) {
+        logout();
+      } else {
+        toast.error('Failed to fetch articles.');
       }
-    };
+      // eslint-disable-next-line @typescript-eslint/no-unused-vars
+    } catch (error) {
+      toast.error('An error occurred while fetching articles.');
+    } finally {
+      setIsLoading(false);
+    }
+  }, [accessToken, logout]);
 
+  useEffect(() => {
     if (accessToken) {
-      fetchArticles();
+      fetchArticles('http://localhost:8000/api/store-articles/', false);
     }
-  }, [accessToken, logout]);
+  }, [accessToken, fetchArticles]);
 
-  const handleDownload = (filePath: string | null) => {
-    if (filePath) {
-      window.location.href = `http://localhost:8000${filePath}`;
-    } else {
+  const handleDownload = async (filePath: string | null) => {
+    if (!filePath) {
       toast.error('File path is not available.');
+      return;
+    }
+    // The download checks access, so it needs our bearer token: fetch it and save the blob
+    try {
+      const response = await fetch(`http://localhost:8000${filePath}`, {
+        headers: { Authorization: `Bearer ${accessToken}` },
+      });
+      if (response.status === 401) {
+        logout();
+        return;
+      }
+      if (!response.ok) {
+        toast.error('Failed to download the file.');
+        return;
+      }
+      const disposition = response.headers.get('Content-Disposition') || '';
+      const match = disposition.match(/filename="?([^";]+)"?/);
+      const url = URL.createObjectURL(await response.blob());
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = match ? match[1] : 'article';
+      link.click();
+      URL.revokeObjectURL(url);
+      // eslint-disable-next-line @typescript-eslint/no-unused-vars
+    } catch (error) {
+      toast.error('An error occurred while downloading the file.');
     }
   };
 
   return (
     <div style={styles.container}>
       <h1>Store Articles</h1>
-      {isLoading ? (
+      {isLoading && articles.length === 0 ? (
         <p>Loading...</p>
       ) : (
         <ul style={styles.articleList}>
@@ -75,6 +109,11 @@ const StoreArticles: React.FC = () => {
           ))}
         </ul>
       )}
+      {nextUrl && (
+        <button onClick={() => fetchArticles(nextUrl, true)} disabled={isLoading} style={styles.downloadButton}>
+          {isLoading ? 'Loading...' : 'Load more articles'}
+        </button>
+      )}
     </div>
   );
 };
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'okok.settings')
+# Route the hot API endpoints to their async views (see api/async_views.py)
+os.environ.setdefault('API_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
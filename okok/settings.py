@@ -44,6 +44,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.instrumentation.InstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,14 +57,27 @@ MIDDLEWARE = [
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
+# The frontend names downloaded article files after the download's Content-Disposition
+CORS_EXPOSE_HEADERS = ['Content-Disposition']
 
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.instrumentation.TimedJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ],
 }
 
+# Default page size for the keyset-paginated list endpoints (?page_size= overrides it)
+API_PAGE_SIZE = 50
+
+# Serve the hot endpoints with the native async views in api/async_views.py. okok/asgi.py
+# switches this on, so WSGI deployments keep using the synchronous viewsets
+API_ASYNC_VIEWS = os.environ.get('API_ASYNC_VIEWS') == '1'
+
 ROOT_URLCONF = 'okok.urls'
 
 TEMPLATES = [
@@ -111,6 +125,113 @@ DATABASES = {
     }
 }
 
+# Read replicas of 'default' (api/routing.py): alias -> weight. Replicas are listed in
+# DATABASE_REPLICA_HOSTS as host[:port][=weight], comma-separated, with the credentials
+# of 'default'. Users who write read from 'default' for READ_YOUR_WRITES_WINDOW seconds;
+# keep it above the replication lag. The pins live in the 'default' cache, so with several
+# workers this needs REDIS_URL (see Caches below).
+DATABASE_REPLICAS = {}
+for number, entry in enumerate(filter(None, os.environ.get('DATABASE_REPLICA_HOSTS', '').split(',')), 1):
+    address, _, weight = entry.partition('=')
+    host, _, port = address.partition(':')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'], 'HOST': host, 'PORT': port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS[f'replica{number}'] = int(weight or 1)
+
+# SQLITE_REPLICA=1 stands two SQLite files in for a primary and a replica. Copy
+# db.sqlite3 over db-replica.sqlite3 to "replicate"; until then the replica lags.
+if os.environ.get('SQLITE_REPLICA') == '1':
+    DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(BASE_DIR, 'db.sqlite3')},
+        'replica': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(BASE_DIR, 'db-replica.sqlite3'),
+            'TEST': {'MIRROR': 'default'},
+        },
+    }
+    DATABASE_REPLICAS = {'replica': 1}
+
+DATABASE_ROUTERS = ['api.routing.ReplicaRouter']
+READ_YOUR_WRITES_WINDOW = 5
+
+
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+# 'default' holds short-lived authentication entries (api/authentication.py) and the
+# read-your-writes pins of replica routing (api/routing.py), 'eligibility' the per-user
+# eligibility snapshots (api/eligibility.py). Local memory is LRU-bounded but private to
+# each process, so set REDIS_URL when running several workers (the pins need it whenever
+# DATABASE_REPLICAS is set);
+# configure Redis with maxmemory-policy allkeys-lru so it stays bounded too.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+            'KEY_PREFIX': alias,
+            'TIMEOUT': 300,
+        }
+        for alias in ('default', 'eligibility')
+    }
+else:
+    CACHES = {
+        alias: {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': alias,
+            'TIMEOUT': 300,
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+        for alias in ('default', 'eligibility')
+    }
+
+# Seconds an authenticated user and profile stay cached between database lookups
+AUTH_USER_CACHE_TIMEOUT = 60
+
+# Reading-position beacons (api/progress.py) are buffered in the 'default' cache and
+# written every PROGRESS_FLUSH_INTERVAL seconds; buffered entries expire after
+# PROGRESS_BUFFER_TIMEOUT seconds
+PROGRESS_FLUSH_INTERVAL = 2
+PROGRESS_BUFFER_TIMEOUT = 3600
+
+# Leaderboards (api/leaderboard.py): each process refreshes a domain's board with the rows
+# changed in the last LEADERBOARD_CACHE_TIMEOUT seconds, plus LEADERBOARD_CHANGE_OVERLAP
+# seconds for late commits and clock skew, and rebuilds it fully every
+# LEADERBOARD_REBUILD_INTERVAL seconds to drop hard-deleted rows
+LEADERBOARD_CACHE_TIMEOUT = 10
+LEADERBOARD_CHANGE_OVERLAP = 60
+LEADERBOARD_REBUILD_INTERVAL = 600
+
+# Request instrumentation (api/instrumentation.py): a Server-Timing header with the SQL,
+# serialization, rendering and view time of each request, for staff users only (True:
+# everyone, False: nobody); requests slower than SLOW_REQUEST_THRESHOLD seconds are logged
+# with their SLOW_REQUEST_QUERIES slowest and most repeated queries
+SERVER_TIMING = 'staff'
+SLOW_REQUEST_THRESHOLD = 0.5
+SLOW_REQUEST_QUERIES = 5
+# Fraction of requests whose stacks are sampled every PROFILE_INTERVAL seconds and written
+# to PROFILE_DIR as folded stacks for flamegraph.pl or speedscope; 0 disables profiling
+PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+PROFILE_INTERVAL = 0.005
+PROFILE_DIR = os.path.join(BASE_DIR, 'profiles')
+
+# Per-view request metrics (api/metrics.py) at /api/metrics/, for staff users and for
+# scrapers sending "Authorization: Bearer <METRICS_TOKEN>" (no token: staff only). With
+# several worker processes, point METRICS_DIR at a directory they share; each writes its
+# totals there every METRICS_FLUSH_INTERVAL seconds
+METRICS = True
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_INTERVAL = 5
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'loggers': {'api': {'handlers': ['console'], 'level': 'INFO'}},
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -142,9 +263,16 @@ USE_I18N = True
 
 USE_TZ = True
 
+# Uploaded article files. Never serve MEDIA_ROOT directly (no static() route, no public web
+# server location): readers download through /api/articles/<pk>/download/, which checks access
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Hand article downloads to the web server: None, 'x-accel-redirect' (nginx) or 'x-sendfile'
+ARTICLE_FILE_OFFLOAD = None
+# nginx internal location aliased to MEDIA_ROOT, used with 'x-accel-redirect'
+ARTICLE_FILE_ACCEL_PREFIX = '/protected-media/'
+
 # Static files (CSS, JavaScript, Images)
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 